@@ -0,0 +1,181 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+from metrics import timer
+
+# Gas reading above which dashboard.py sends the "Fire Detected" SMS
+GAS_ALERT_THRESHOLD = 100
+# Ensemble votes shown as a red alert on the dashboard
+RISK_ALERT_LEVELS = ["High", "Extreme"]
+
+DEFAULT_DEDUP_WINDOW = 600.0
+DEFAULT_RATE = 1 / 10.0
+DEFAULT_BURST = 3
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF = 1.0
+DEFAULT_MAX_BACKOFF = 60.0
+
+
+# Alert decisions for N readings: SMS on gas, red banner on High/Extreme vote
+def alert_flags(vote, mq5):
+    return {
+        "sms": np.asarray(mq5, dtype=float) > GAS_ALERT_THRESHOLD,
+        "risk": np.isin(np.asarray(vote), RISK_ALERT_LEVELS),
+    }
+
+
+# Twilio SMS with one client reused for every message
+class TwilioTransport:
+    def __init__(self, account_sid, auth_token, from_number):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._client = None
+
+    def send(self, to_number, body):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(self.account_sid, self.auth_token)
+        message = self._client.messages.create(body=body, from_=self.from_number, to=to_number)
+        return message.sid
+
+
+# Records messages instead of sending them; fails the first `failures` sends
+class FakeTransport:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = 0
+        self.sent = []
+
+    def send(self, to_number, body):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("fake transport failure")
+        self.sent.append((to_number, body))
+        return f"FAKE{len(self.sent):06d}"
+
+
+# Allows `burst` sends at once, refilled at `rate` tokens per second
+class TokenBucket:
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+
+    # Seconds to wait before a token is available (0 if one was taken)
+    def take(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+# Sends alerts from a background thread so callers never block on the transport.
+# An alert for a (station, severity) that is still being sent, or was delivered
+# to any recipient within dedup_window seconds, is dropped; an alert that failed
+# for every recipient does not suppress the next one. Sends are rate limited by
+# a token bucket and retried with exponential backoff.
+class AlertDispatcher:
+    def __init__(self, transport, recipients, dedup_window=DEFAULT_DEDUP_WINDOW, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF):
+        self.transport = transport
+        self.recipients = list(recipients)
+        self.dedup_window = dedup_window
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.counts = {"submitted": 0, "deduplicated": 0, "sent": 0, "retries": 0, "failed": 0}
+        self._last_sent = {}
+        self._pending = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    # Queue an alert; returns False if it was dropped as a duplicate
+    def submit(self, station, severity, message):
+        now = time.monotonic()
+        key = (station, severity)
+        with self._lock:
+            self.counts["submitted"] += 1
+            last = self._last_sent.get(key)
+            if key in self._pending or (last is not None and now - last < self.dedup_window):
+                self.counts["deduplicated"] += 1
+                return False
+            if not self.recipients:
+                return True
+            self._pending[key] = {"remaining": len(self.recipients), "delivered": False}
+        for recipient in self.recipients:
+            self._queue.put((key, recipient, message))
+        return True
+
+    # Once every recipient of an alert is done, start its dedup window if any send succeeded
+    def _finish(self, key, sent):
+        with self._lock:
+            self.counts["sent" if sent else "failed"] += 1
+            pending = self._pending[key]
+            pending["remaining"] -= 1
+            pending["delivered"] |= sent
+            if pending["remaining"] == 0:
+                del self._pending[key]
+                if pending["delivered"]:
+                    self._last_sent[key] = time.monotonic()
+
+    def _send(self, recipient, message):
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            wait = self.bucket.take()
+            while wait > 0:
+                if self._stop.wait(wait):
+                    return False
+                wait = self.bucket.take()
+            try:
+                with timer("sms_send"):
+                    sid = self.transport.send(recipient, message)
+                print(f"SMS sent: {sid}")
+                return True
+            except Exception as e:
+                print(f"Failed to send SMS: {e}")
+                if attempt == self.max_retries:
+                    return False
+                with self._lock:
+                    self.counts["retries"] += 1
+                if self._stop.wait(delay):
+                    return False
+                delay = min(delay * 2, self.max_backoff)
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                key, recipient, message = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._finish(key, self._send(recipient, message))
+            self._queue.task_done()
+
+    # Block until every queued alert has been sent or given up on
+    def join(self):
+        self._queue.join()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {**self.counts, "queued": self._queue.qsize()}
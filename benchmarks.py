@@ -0,0 +1,262 @@
+import argparse
+import copy
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+
+import numpy as np
+
+from fire_indices import SENSOR_FIELDS, feature_matrix, features_from_columns
+from inference import ENSEMBLE_ORDER, predict_batch, predict_codes
+from model_registry import BASE_DIR, MODEL_FILES, ModelRegistry
+
+DEFAULT_SIZES = [1, 64, 1024, 16384]
+DEFAULT_THREADS = [1, os.cpu_count() or 1]
+DEFAULT_HISTORY = "benchmark_history.json"
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_MAX_REPEATS = 50
+DEFAULT_THRESHOLD = 0.10
+
+
+# Random raw sensor columns in the ranges the dashboard tiles are tuned for
+def sensor_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    low = {"tempBMP": 10, "humidity": 10, "pressure": 900, "soil": 0, "mq7": 0, "mq5": 0}
+    high = {"tempBMP": 50, "humidity": 90, "pressure": 1020, "soil": 1000, "mq7": 1000, "mq5": 800}
+    return {field: rng.uniform(low[field], high[field], n).round(2) for field in SENSOR_FIELDS}
+
+
+# Thread budget for one run: BLAS/OpenMP pools via threadpoolctl (if present)
+# plus each model's own n_jobs/nthread setting
+def thread_limit(threads):
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return nullcontext()
+    return threadpool_limits(threads)
+
+
+# Fitted CatBoost models reject set_params, so their thread count goes to predict()
+class _Threaded:
+    def __init__(self, model, threads):
+        self.model = model
+        self.threads = threads
+
+    def predict(self, X):
+        return self.model.predict(X, thread_count=self.threads)
+
+
+# A copy of the model limited to `threads`; the registry's shared instance is
+# left untouched (XGBoost's set_params also rewrites the booster's nthread)
+def with_threads(model, threads):
+    if type(model).__name__.startswith("CatBoost"):
+        return _Threaded(model, threads)
+    if "n_jobs" in model.get_params():
+        model = copy.deepcopy(model)
+        model.set_params(n_jobs=threads)
+    return model
+
+
+# Registry view handing out models limited to `threads`
+class _ThreadedRegistry:
+    def __init__(self, registry, threads):
+        self.models = {name: with_threads(registry.get(name), threads) for name in ENSEMBLE_ORDER}
+
+    def get(self, name):
+        return self.models[name]
+
+
+# Benchmarks: name -> setup(size, threads, registry) returning the callable to time.
+# Sizes are rows per call; cold_load ignores them.
+def _generate(size, threads, registry):
+    from data import generate_columns
+    rng = np.random.default_rng(0)
+    return lambda: generate_columns(size, rng)
+
+
+def _indices(size, threads, registry):
+    columns = sensor_columns(size)
+    return lambda: features_from_columns(columns)
+
+
+def _predict(name):
+    def setup(size, threads, registry):
+        model = with_threads(registry.get(name), threads)
+        X = feature_matrix(features_from_columns(sensor_columns(size)))
+        return lambda: predict_codes(model, X)
+    return setup
+
+
+def _score(size, threads, registry):
+    threaded = _ThreadedRegistry(registry, threads)
+    columns = sensor_columns(size)
+    return lambda: predict_batch(feature_matrix(features_from_columns(columns)), threaded)
+
+
+# Fresh interpreter importing the model libraries and unpickling all five models
+def _cold_load(size, threads, registry):
+    code = ("from model_registry import ModelRegistry\n"
+            "registry = ModelRegistry(check_mtime=False)\n"
+            "[registry.get(name) for name in registry.names]\n")
+    env = {**os.environ, "OMP_NUM_THREADS": str(threads)}
+    return lambda: subprocess.run([sys.executable, "-W", "ignore", "-c", code], cwd=BASE_DIR, env=env, check=True)
+
+
+BENCHMARKS = {
+    "generate": _generate,
+    "indices": _indices,
+    **{f"predict/{name}": _predict(name) for name in ENSEMBLE_ORDER},
+    "score": _score,
+    "cold_load": _cold_load,
+}
+SIZELESS = {"cold_load"}
+
+
+# Call fn until min_time has passed (at least 3, at most max_repeats times) after one warm-up call
+def time_call(fn, min_time=DEFAULT_MIN_TIME, max_repeats=DEFAULT_MAX_REPEATS):
+    fn()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < 3 or (time.perf_counter() < deadline and len(timings) < max_repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmarks(names=None, sizes=DEFAULT_SIZES, threads=DEFAULT_THREADS, min_time=DEFAULT_MIN_TIME,
+                   max_repeats=DEFAULT_MAX_REPEATS):
+    import warnings
+    warnings.filterwarnings("ignore")
+    registry = ModelRegistry(check_mtime=False)
+    results = []
+    for name in names or list(BENCHMARKS):
+        for thread_count in threads:
+            for size in [None] if name in SIZELESS else sizes:
+                with thread_limit(thread_count):
+                    fn = BENCHMARKS[name](size, thread_count, registry)
+                    timings = time_call(fn, min_time, 5 if name in SIZELESS else max_repeats)
+                median = statistics.median(timings)
+                result = {
+                    "name": name,
+                    "size": size,
+                    "threads": thread_count,
+                    "repeats": len(timings),
+                    "median": median,
+                    "min": min(timings),
+                    "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+                }
+                if size:
+                    result["rows_per_second"] = size / median
+                results.append(result)
+                print(f"{name:>24}  size {str(size or '-'):>6}  threads {thread_count:2d}  "
+                      f"median {median * 1000:10.3f} ms" + (f"  {size / median:12.0f} rows/s" if size else ""))
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path=DEFAULT_HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+# Append one run (results plus commit and machine details) to the history file
+def record_run(results, path=DEFAULT_HISTORY, label=None):
+    history = load_history(path)
+    run = {
+        "id": len(history),
+        "label": label,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "models": {name: os.path.getsize(os.path.join(BASE_DIR, filename)) for name, filename in MODEL_FILES.items()},
+        "results": results,
+    }
+    history.append(run)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+    return run
+
+
+def _find_run(history, run_id):
+    if run_id is None:
+        return None
+    for run in history:
+        if str(run["id"]) == str(run_id) or run.get("label") == run_id:
+            return run
+    raise ValueError(f"no run {run_id!r} in history")
+
+
+# Median time ratio candidate / baseline for every benchmark both runs have.
+# Ratios above 1 + threshold are regressions, below 1 - threshold improvements.
+def compare_runs(baseline, candidate, threshold=DEFAULT_THRESHOLD):
+    base = {(r["name"], r["size"], r["threads"]): r for r in baseline["results"]}
+    rows = []
+    for result in candidate["results"]:
+        key = (result["name"], result["size"], result["threads"])
+        if key not in base:
+            continue
+        ratio = result["median"] / base[key]["median"]
+        status = "regression" if ratio > 1 + threshold else "improvement" if ratio < 1 - threshold else "ok"
+        rows.append({"name": key[0], "size": key[1], "threads": key[2], "baseline": base[key]["median"],
+                     "candidate": result["median"], "ratio": ratio, "status": status})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the generation, index and inference hot paths")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="run benchmarks and append the results to the history file")
+    run.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=None)
+    run.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run.add_argument("--threads", type=int, nargs="+", default=sorted(set(DEFAULT_THREADS)))
+    run.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+    run.add_argument("--label", default=None)
+    run.add_argument("--history", default=DEFAULT_HISTORY)
+    compare = sub.add_parser("compare", help="compare two runs (default: the last two) and flag regressions")
+    compare.add_argument("baseline", nargs="?", default=None, help="run id or label")
+    compare.add_argument("candidate", nargs="?", default=None, help="run id or label")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare.add_argument("--history", default=DEFAULT_HISTORY)
+    listing = sub.add_parser("list", help="list the runs in the history file")
+    listing.add_argument("--history", default=DEFAULT_HISTORY)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_benchmarks(args.only, args.sizes, args.threads, args.min_time)
+        recorded = record_run(results, args.history, args.label)
+        print(f"Recorded run {recorded['id']} in {args.history}")
+    elif args.command == "list":
+        for recorded in load_history(args.history):
+            print(f"{recorded['id']:4d}  {recorded['timestamp']}  {recorded['commit'] or '-':>9}  "
+                  f"{recorded['label'] or ''}  ({len(recorded['results'])} results)")
+    else:
+        history = load_history(args.history)
+        if len(history) < 2 and (args.baseline is None or args.candidate is None):
+            sys.exit(f"Need two runs in {args.history} to compare")
+        baseline = _find_run(history, args.baseline) or history[-2]
+        candidate = _find_run(history, args.candidate) or history[-1]
+        rows = compare_runs(baseline, candidate, args.threshold)
+        for row in rows:
+            print(f"{row['name']:>24}  size {str(row['size'] or '-'):>6}  threads {row['threads']:2d}  "
+                  f"{row['baseline'] * 1000:10.3f} -> {row['candidate'] * 1000:10.3f} ms  x{row['ratio']:.2f}  {row['status']}")
+        regressions = [row for row in rows if row["status"] == "regression"]
+        print(f"run {baseline['id']} -> run {candidate['id']}: {len(rows)} compared, {len(regressions)} regressions")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,121 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data import FEATURE_COLUMNS
+from inference import ENSEMBLE_ORDER, RISK_LABELS, majority_vote, predict_batch
+from model_registry import default_registry
+
+# Cheap models run first, the heavier ones only for the rows they cannot settle
+DEFAULT_STAGES = [["decision_tree", "lightgbm"], ["random_forest", "catboost", "xgboost"]]
+DEFAULT_THRESHOLD = 0.9
+
+
+# Early-exit version of the five-model vote
+# After every stage except the last, rows where all models run so far agree
+# with at least `threshold` probability stop there. Rows reaching the last
+# stage get the same Counter-style vote as inference.predict_batch.
+class CascadeEnsemble:
+    def __init__(self, registry=None, stages=DEFAULT_STAGES, threshold=DEFAULT_THRESHOLD):
+        self.registry = registry or default_registry()
+        self.stages = [list(stage) for stage in stages]
+        self.threshold = threshold
+        self.rows = 0
+        self.stage_exits = [0] * len(self.stages)
+
+    # Codes and confidence of one model over the rows still in the cascade
+    def _run(self, name, X):
+        model = self.registry.get(name)
+        proba = np.asarray(model.predict_proba(X))
+        classes = np.asarray(model.classes_).astype(np.int64)
+        best = proba.argmax(axis=1)
+        return classes[best], proba[np.arange(len(X)), best]
+
+    def predict(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        n = len(X)
+        codes = {name: np.full(n, -1, dtype=np.int64) for name in ENSEMBLE_ORDER}
+        confidence = np.ones(n)
+        vote_codes = np.full(n, -1, dtype=np.int64)
+        exit_stage = np.full(n, -1, dtype=np.int64)
+        active = np.arange(n)
+        run = []
+
+        for stage_index, stage in enumerate(self.stages):
+            if len(active) == 0:
+                break
+            for name in stage:
+                stage_codes, stage_confidence = self._run(name, X[active])
+                codes[name][active] = stage_codes
+                confidence[active] = np.minimum(confidence[active], stage_confidence)
+                run.append(name)
+
+            run_codes = np.stack([codes[name][active] for name in run])
+            if stage_index == len(self.stages) - 1:
+                ordered = np.stack([codes[name][active] for name in ENSEMBLE_ORDER if name in run])
+                vote_codes[active] = majority_vote(ordered)[0]
+                done = np.ones(len(active), dtype=bool)
+            else:
+                done = (run_codes == run_codes[0]).all(axis=0) & (confidence[active] >= self.threshold)
+                vote_codes[active[done]] = run_codes[0, done]
+
+            exit_stage[active[done]] = stage_index
+            self.stage_exits[stage_index] += int(done.sum())
+            active = active[~done]
+
+        self.rows += n
+        return {
+            "codes": codes,
+            "vote_codes": vote_codes,
+            "vote": RISK_LABELS[vote_codes],
+            "exit_stage": exit_stage,
+        }
+
+    # Fraction of rows that left the cascade at each stage so far
+    def stats(self):
+        return {
+            "rows": self.rows,
+            "threshold": self.threshold,
+            "stages": [
+                {"models": stage, "exits": exits, "exit_rate": exits / self.rows if self.rows else 0.0}
+                for stage, exits in zip(self.stages, self.stage_exits)
+            ],
+        }
+
+
+# Compare the cascade with the full five-model vote on a labelled dataset
+def evaluate(path="Dataset.csv", threshold=DEFAULT_THRESHOLD, stages=DEFAULT_STAGES, registry=None):
+    registry = registry or default_registry()
+    X = pd.read_csv(path)[FEATURE_COLUMNS].to_numpy(dtype=float)
+    for name in ENSEMBLE_ORDER:
+        registry.get(name)
+
+    start = time.perf_counter()
+    full = predict_batch(X, registry)
+    full_seconds = time.perf_counter() - start
+
+    cascade = CascadeEnsemble(registry, stages, threshold)
+    start = time.perf_counter()
+    result = cascade.predict(X)
+    cascade_seconds = time.perf_counter() - start
+
+    report = cascade.stats()
+    report["agreement"] = float((result["vote_codes"] == full["vote_codes"]).mean())
+    report["full_seconds"] = full_seconds
+    report["cascade_seconds"] = cascade_seconds
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the early-exit cascade against the full ensemble vote")
+    parser.add_argument("--data", default="Dataset.csv")
+    parser.add_argument("--threshold", type=float, nargs="+", default=[DEFAULT_THRESHOLD])
+    args = parser.parse_args()
+
+    for threshold in args.threshold:
+        report = evaluate(args.data, threshold)
+        exits = ", ".join(f"{'+'.join(stage['models'])}: {stage['exit_rate']:.1%}" for stage in report["stages"])
+        print(f"threshold {threshold:.2f}  agreement {report['agreement']:.2%}  "
+              f"time {report['cascade_seconds'] * 1000:.0f} ms vs {report['full_seconds'] * 1000:.0f} ms  exits [{exits}]")
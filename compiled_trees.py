@@ -0,0 +1,402 @@
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from inference import ENSEMBLE_ORDER, RISK_LABELS, majority_vote
+
+# Flat node layout shared by every model family:
+#   feature[i], threshold[i]  go left when x[feature] <= threshold
+#   left[i], right[i]         child node indices (global within the forest)
+#   default_left[i]           direction for NaN inputs
+#   value[i]                  output vector added when i is a leaf
+# Leaves point to themselves with an infinite threshold, so traversal can run
+# a fixed number of steps without checking for leaves.
+#
+# Scoring here is pure NumPy and several times slower per row than each
+# library's native predict, which stays the default everywhere. The compiled
+# form is for processes that should not import xgboost/lightgbm/catboost or
+# unpickle the models: it loads in milliseconds from a memory-mapped artifact
+# whose pages every process on the host shares (see model_artifact.py).
+ARRAY_NAMES = ["feature", "threshold", "left", "right", "default_left", "value", "roots", "base_score", "classes"]
+
+# Rows per traversal chunk are chosen so a (trees, rows, outputs) block stays near this size
+CHUNK_ELEMENTS = 1 << 22
+
+
+class CompiledForest:
+    def __init__(self, kind, feature, threshold, left, right, default_left, value, roots, base_score, classes,
+                 scale=1.0, max_depth=0, input_dtype="float64", oblivious=False):
+        self.kind = kind
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.base_score = base_score
+        self.classes = classes
+        self.scale = scale
+        self.max_depth = max_depth
+        self.input_dtype = input_dtype
+        self.oblivious = oblivious
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def meta(self):
+        return {"kind": self.kind, "scale": self.scale, "max_depth": self.max_depth, "input_dtype": self.input_dtype,
+                "oblivious": self.oblivious}
+
+    def arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, meta, arrays):
+        return cls(meta["kind"], *(arrays[name] for name in ARRAY_NAMES),
+                   scale=meta["scale"], max_depth=meta["max_depth"], input_dtype=meta["input_dtype"],
+                   oblivious=meta.get("oblivious", False))
+
+    # Leaf index reached in every tree, shape (n_trees, n_rows)
+    # All (tree, row) pairs advance one level per step, reading the stored
+    # arrays in place (so memory-mapped artifacts stay shared between
+    # processes); pairs are dropped once they sit on a leaf, which loops to itself
+    def apply(self, X):
+        X = np.asarray(X).astype(self.input_dtype).astype(np.float64)
+        if self.oblivious:
+            return self._apply_oblivious(X)
+        n = len(X)
+        flat = np.ascontiguousarray(X.T).ravel()
+        has_nan = np.isnan(flat).any()
+
+        nodes = np.repeat(self.roots.astype(np.intp), n)
+        out = nodes.copy()
+        rows = np.tile(np.arange(n, dtype=np.intp), self.n_trees)
+        position = np.arange(nodes.size)
+        for _ in range(self.max_depth + 1):
+            x = flat[self.feature[nodes] * n + rows]
+            went_left = x <= self.threshold[nodes]
+            if has_nan:
+                went_left |= np.isnan(x) & self.default_left[nodes]
+            children = np.where(went_left, self.left[nodes], self.right[nodes])
+            active = children != nodes
+            if not active.all():
+                out[position[~active]] = nodes[~active]
+                children, rows, position = children[active], rows[active], position[active]
+            nodes = children
+            if nodes.size == 0:
+                break
+        out[position] = nodes
+        return out.reshape(self.n_trees, n)
+
+    # Oblivious trees are stored as complete trees of equal depth where every
+    # node on a level shares one split, so the leaf follows from the level bits
+    def _apply_oblivious(self, X):
+        depth = self.max_depth
+        columns = np.ascontiguousarray(X.T)
+        position = np.zeros((self.n_trees, len(X)), dtype=np.int64)
+        for level in range(depth):
+            first = self.roots + (1 << level) - 1
+            went_right = columns[self.feature[first]] > self.threshold[first, None]
+            position = (position << 1) | went_right
+        return self.roots[:, None] + (1 << depth) - 1 + position
+
+    # Raw ensemble output (margins for boosting, mean probabilities for forests)
+    def predict_scores(self, X):
+        X = np.atleast_2d(X)
+        scores = np.empty((len(X), self.value.shape[1]))
+        chunk = max(1, CHUNK_ELEMENTS // (self.n_trees * self.value.shape[1]))
+        for start in range(0, len(X), chunk):
+            leaves = self.apply(X[start:start + chunk])
+            scores[start:start + chunk] = self.base_score + self.scale * self.value[leaves].sum(axis=0)
+        return scores
+
+    def predict(self, X):
+        return self.classes[self.predict_scores(X).argmax(axis=1)]
+
+
+# Build a forest from per-tree node lists, offsetting child indices into one flat array
+def _assemble(kind, trees, n_outputs, base_score, classes, scale=1.0, input_dtype="float64", oblivious=False):
+    roots, offset = [], 0
+    parts = {name: [] for name in ["feature", "threshold", "left", "right", "default_left", "value"]}
+    max_depth = 0
+    for tree in trees:
+        n = len(tree["feature"])
+        leaf = tree["left"] < 0
+        own = np.arange(n)
+        parts["feature"].append(np.where(leaf, 0, tree["feature"]))
+        parts["threshold"].append(np.where(leaf, np.inf, tree["threshold"]))
+        parts["left"].append(np.where(leaf, own, tree["left"]) + offset)
+        parts["right"].append(np.where(leaf, own, tree["right"]) + offset)
+        parts["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+        value = np.zeros((n, n_outputs))
+        value[leaf] = tree["value"][leaf]
+        parts["value"].append(value)
+        roots.append(offset)
+        max_depth = max(max_depth, _depth(tree["left"], tree["right"]))
+        offset += n
+    return CompiledForest(
+        kind,
+        np.concatenate(parts["feature"]).astype(np.int32),
+        np.concatenate(parts["threshold"]).astype(np.float64),
+        np.concatenate(parts["left"]).astype(np.int32),
+        np.concatenate(parts["right"]).astype(np.int32),
+        np.concatenate(parts["default_left"]),
+        np.concatenate(parts["value"]),
+        np.asarray(roots, dtype=np.int32),
+        np.asarray(base_score, dtype=np.float64),
+        np.asarray(classes, dtype=np.int64),
+        scale=float(scale),
+        max_depth=int(max_depth),
+        input_dtype=input_dtype,
+        oblivious=oblivious,
+    )
+
+# Depth of a tree given its child arrays (root is node 0, leaves have left < 0)
+def _depth(left, right):
+    depth, level = 0, [0]
+    while True:
+        level = [child for node in level if left[node] >= 0 for child in (left[node], right[node])]
+        if not level:
+            return depth
+        depth += 1
+
+
+# scikit-learn DecisionTreeClassifier / RandomForestClassifier
+# sklearn compares float32 inputs against float64 thresholds, left when x <= threshold
+def compile_sklearn(model):
+    estimators = getattr(model, "estimators_", [model])
+    trees = []
+    for estimator in estimators:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :].astype(np.float64)
+        value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-300)
+        trees.append({
+            "feature": tree.feature,
+            "threshold": tree.threshold,
+            "left": tree.children_left,
+            "right": tree.children_right,
+            "default_left": tree.missing_go_to_left.astype(bool) if hasattr(tree, "missing_go_to_left") else np.zeros(tree.node_count, dtype=bool),
+            "value": value,
+        })
+    n_classes = len(model.classes_)
+    return _assemble("sklearn", trees, n_classes, np.zeros(n_classes), model.classes_,
+                     scale=1.0 / len(estimators), input_dtype="float32")
+
+
+# XGBoost gbtree, left when float32(x) < split_condition
+# Strict "<" in float32 equals "<=" against the next float32 below the split
+def compile_xgboost(model):
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw("json"))["learner"]
+    n_classes = max(int(learner["learner_model_param"]["num_class"]), 1)
+    base_score = np.atleast_1d(np.asarray(json.loads(learner["learner_model_param"]["base_score"]), dtype=np.float64))
+    base_score = np.broadcast_to(base_score, (n_classes,)).copy()
+    gbtree = learner["gradient_booster"]["model"]
+    trees = []
+    for tree, tree_class in zip(gbtree["trees"], gbtree["tree_info"]):
+        left = np.asarray(tree["left_children"])
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+        threshold = np.nextafter(conditions, np.float32(-np.inf)).astype(np.float64)
+        value = np.zeros((len(left), n_classes))
+        value[:, tree_class] = conditions
+        trees.append({
+            "feature": np.asarray(tree["split_indices"]),
+            "threshold": threshold,
+            "left": left,
+            "right": np.asarray(tree["right_children"]),
+            "default_left": np.asarray(tree["default_left"], dtype=bool),
+            "value": value,
+        })
+    return _assemble("xgboost", trees, n_classes, base_score, getattr(model, "classes_", np.arange(n_classes)),
+                     input_dtype="float32")
+
+
+# LightGBM numerical trees, left when double(x) <= threshold
+def compile_lightgbm(model):
+    dump = model.booster_.dump_model()
+    n_classes = dump["num_tree_per_iteration"]
+    trees = []
+    for index, info in enumerate(dump["tree_info"]):
+        feature, threshold, left, right, default_left, leaf_value = [], [], [], [], [], []
+
+        def visit(node):
+            i = len(feature)
+            feature.append(node.get("split_feature", 0))
+            threshold.append(node.get("threshold", np.inf))
+            left.append(-1)
+            right.append(-1)
+            default_left.append(node.get("default_left", False))
+            leaf_value.append(node.get("leaf_value", 0.0))
+            if "leaf_value" not in node:
+                if node["decision_type"] != "<=":
+                    raise ValueError(f"Unsupported LightGBM decision type {node['decision_type']}")
+                left[i] = visit(node["left_child"])
+                right[i] = visit(node["right_child"])
+            return i
+
+        visit(info["tree_structure"])
+        value = np.zeros((len(feature), n_classes))
+        value[:, index % n_classes] = leaf_value
+        trees.append({
+            "feature": np.asarray(feature),
+            "threshold": np.asarray(threshold, dtype=np.float64),
+            "left": np.asarray(left),
+            "right": np.asarray(right),
+            "default_left": np.asarray(default_left, dtype=bool),
+            "value": value,
+        })
+    classes = getattr(model, "classes_", np.arange(n_classes))
+    return _assemble("lightgbm", trees, n_classes, np.zeros(n_classes), classes, input_dtype="float64")
+
+
+# CatBoost oblivious trees, expanded into complete binary trees
+# Split d of a tree sets bit d of the leaf index when float32(x) > border
+def compile_catboost(model):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            dump = json.load(f)
+    flat_index = {feature["feature_index"]: feature["flat_feature_index"] for feature in dump["features_info"]["float_features"]}
+    scale, bias = dump["scale_and_bias"]
+    n_classes = len(np.atleast_1d(bias))
+    trees = []
+    for tree in dump["oblivious_trees"]:
+        splits = tree["splits"]
+        depth = len(splits)
+        leaf_values = np.asarray(tree["leaf_values"], dtype=np.float64).reshape(1 << depth, n_classes)
+        n_internal = (1 << depth) - 1
+        n = n_internal + (1 << depth)
+        feature = np.zeros(n, dtype=np.int64)
+        threshold = np.full(n, np.inf)
+        left = np.full(n, -1)
+        right = np.full(n, -1)
+        value = np.zeros((n, n_classes))
+        # Level l of the expanded tree tests the split that sets bit (depth - 1 - l),
+        # so the leaf reached at position p of the last level has leaf index p
+        for level in range(depth):
+            split = splits[depth - 1 - level]
+            if split.get("split_type", "FloatFeature") != "FloatFeature":
+                raise ValueError(f"Unsupported CatBoost split type {split['split_type']}")
+            for node in range((1 << level) - 1, (1 << (level + 1)) - 1):
+                feature[node] = flat_index[split["float_feature_index"]]
+                threshold[node] = split["border"]
+                left[node] = 2 * node + 1
+                right[node] = 2 * node + 2
+        value[n_internal:] = leaf_values
+        trees.append({"feature": feature, "threshold": threshold, "left": left, "right": right,
+                      "default_left": np.ones(n, dtype=bool), "value": value})
+    classes = np.asarray(model.classes_).astype(np.int64)
+    base_score = np.broadcast_to(np.asarray(bias, dtype=np.float64), (n_classes,)).copy()
+    oblivious = len({len(tree["splits"]) for tree in dump["oblivious_trees"]}) == 1
+    return _assemble("catboost", trees, n_classes, base_score, classes, scale=scale, input_dtype="float32",
+                     oblivious=oblivious)
+
+
+COMPILERS = {
+    "DecisionTreeClassifier": compile_sklearn,
+    "RandomForestClassifier": compile_sklearn,
+    "XGBClassifier": compile_xgboost,
+    "LGBMClassifier": compile_lightgbm,
+    "CatBoostClassifier": compile_catboost,
+}
+
+# Convert any of the five trained model types into a CompiledForest
+def compile_model(model):
+    name = type(model).__name__
+    if name not in COMPILERS:
+        raise TypeError(f"Cannot compile model of type {name}")
+    return COMPILERS[name](model)
+
+
+# Compiled forests looked up by name, usable wherever a ModelRegistry is expected
+class CompiledEnsemble:
+    def __init__(self, forests, feature_names=None, labels=None):
+        self.forests = dict(forests)
+        self.feature_names = feature_names
+        self.labels = labels
+
+    @property
+    def names(self):
+        return list(self.forests)
+
+    def get(self, name):
+        return self.forests[name]
+
+    __getitem__ = get
+
+    # Same result layout as inference.predict_batch, using numpy only
+    def predict_batch(self, X, models=ENSEMBLE_ORDER):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        codes = {name: self.forests[name].predict(X) for name in models}
+        vote_codes, vote_count = majority_vote(np.stack([codes[name] for name in models]))
+        return {
+            "codes": codes,
+            "labels": {name: RISK_LABELS[code] for name, code in codes.items()},
+            "vote_codes": vote_codes,
+            "vote": RISK_LABELS[vote_codes],
+            "vote_count": vote_count,
+        }
+
+    # Save as a single .npz of flat arrays plus JSON metadata
+    def save(self, path):
+        arrays = {}
+        for name, forest in self.forests.items():
+            for array_name, array in forest.arrays().items():
+                arrays[f"{name}/{array_name}"] = array
+        meta = {name: forest.meta() for name, forest in self.forests.items()}
+        np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["__meta__"]))
+            return cls({
+                name: CompiledForest.from_arrays(info, {array: data[f"{name}/{array}"] for array in ARRAY_NAMES})
+                for name, info in meta.items()
+            })
+
+
+# Compile every model in a ModelRegistry
+def compile_registry(registry=None, models=ENSEMBLE_ORDER):
+    from model_registry import default_registry
+    registry = registry or default_registry()
+    return CompiledEnsemble({name: compile_model(registry.get(name)) for name in models})
+
+
+# Fraction of rows where each compiled forest matches the original model
+def verify(ensemble, registry, X):
+    from inference import predict_codes
+    return {name: float((ensemble.get(name).predict(X) == predict_codes(registry.get(name), X)).mean())
+            for name in ensemble.names}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the pickled tree models into flat NumPy arrays")
+    parser.add_argument("--output", default="compiled_models.npz")
+    parser.add_argument("--verify", default="Dataset.csv", help="labelled CSV to check predictions against ('' to skip)")
+    args = parser.parse_args()
+
+    from model_registry import default_registry
+    registry = default_registry()
+    ensemble = compile_registry(registry)
+    ensemble.save(args.output)
+    for name, forest in ensemble.forests.items():
+        print(f"{name:15s} {forest.n_trees:5d} trees {forest.n_nodes:8d} nodes  depth {forest.max_depth}")
+    print(f"Wrote {args.output}")
+
+    if args.verify:
+        import pandas as pd
+        from fire_indices import FEATURE_COLUMNS
+        X = pd.read_csv(args.verify)[FEATURE_COLUMNS].to_numpy(dtype=float)
+        for name, match in verify(ensemble, registry, X).items():
+            print(f"{name:15s} matches original predictions on {match:.4%} of rows")
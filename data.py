@@ -1,7 +1,14 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import numpy as np
 import random
 import math
 
+from fire_indices import FEATURE_COLUMNS
+
 # Function to calculate Air Density
 def calculate_air_density(pressure, temp_c):
     temp_k = temp_c + 273.15
@@ -44,36 +51,186 @@ def classify_risk(fwi):
     else:
         return "High"
 
-# Generate synthetic dataset
-data = []
-for _ in range(8000):
-    # Generate random values for temperature, humidity, pressure, soil moisture, and smoke density
-    temp_c = round(random.uniform(10, 60), 2)  # Temperature in Celsius
-    temp_k = round(temp_c + 273.15, 2)  # Temperature in Kelvin
-    humidity = round(random.uniform(30, 90), 2)  # Humidity in percentage
-    pressure = round(random.uniform(900, 1025), 2)  # Pressure in hPa
-    soil_moisture = round(random.uniform(1, 40), 2)  # Soil moisture in percentage
-    smoke_density = round(random.uniform(30, 70), 2)  # Smoke density in ppm
+COLUMNS = FEATURE_COLUMNS + ["Risk"]
+
+# Vectorized version of classify_risk for whole FWI arrays
+def classify_risk_array(fwi):
+    return np.select([fwi < 10, fwi <= 30], ["Low", "Medium"], default="High")
+
+# Generate n_rows of synthetic data as whole-array NumPy operations
+# Mirrors the per-row helpers above, drawing every random value from rng
+def generate_columns(n_rows, rng):
+    temp_c = np.round(rng.uniform(10, 60, n_rows), 2)  # Temperature in Celsius
+    temp_k = np.round(temp_c + 273.15, 2)  # Temperature in Kelvin
+    humidity = np.round(rng.uniform(30, 90, n_rows), 2)  # Humidity in percentage
+    pressure = np.round(rng.uniform(900, 1025, n_rows), 2)  # Pressure in hPa
+    soil_moisture = np.round(rng.uniform(1, 40, n_rows), 2)  # Soil moisture in percentage
+    smoke_density = np.round(rng.uniform(30, 70, n_rows), 2)  # Smoke density in ppm
 
     # Calculate derived values
-    air_density = calculate_air_density(pressure, temp_c)
-    wind_speed = calculate_wind_speed(pressure, random.uniform(900, 1025), air_density)
-    ffmc = calculate_ffmc(temp_c, humidity)
-    dmc = calculate_dmc(soil_moisture)
-    dc = calculate_dc(soil_moisture)
-    isi = calculate_isi(wind_speed, ffmc)
-    bui = calculate_bui(dmc, dc)
-    fwi = calculate_fwi(isi, bui)
-    risk = classify_risk(fwi)
-
-    # Append data to the list
-    data.append([temp_c, temp_k, humidity, pressure, soil_moisture, smoke_density, air_density, wind_speed, ffmc, dmc, dc, isi, bui, fwi, risk])
-
-# Create DataFrame
-df = pd.DataFrame(data, columns=["Temp(C)", "Temp(K)", "Humidity", "Pressure", "Soil Moisture", "Smoke Density", "Air Density", "Wind Speed", "FFMC", "DMC", "DC", "ISI", "BUI", "FWI", "Risk"])
-
-# Save to CSV
-df.to_csv('fire_risk_dataset.csv', index=False)
-
-# Display first few rows of the dataset
-print(df.head())
+    air_density = np.round(pressure / (temp_c + 273.15), 2)
+    pressure2 = rng.uniform(900, 1025, n_rows)
+    wind_speed = np.round(np.sqrt((2 * np.abs(pressure2 - pressure)) / air_density), 2)
+    ffmc = np.round(0.047 * temp_c + 0.054 * humidity + rng.uniform(0, 10, n_rows), 2)
+    dmc = np.round(soil_moisture * rng.uniform(0.5, 1.5, n_rows), 2)
+    dc = np.round(soil_moisture * rng.uniform(1.0, 2.0, n_rows), 2)
+    isi = np.round(wind_speed * (ffmc / 10), 2)
+    bui = np.round((dmc + dc) / 2, 2)
+    fwi = np.round(isi * (bui / 10), 2)
+    risk = classify_risk_array(fwi)
+
+    values = [temp_c, temp_k, humidity, pressure, soil_moisture, smoke_density, air_density, wind_speed, ffmc, dmc, dc, isi, bui, fwi, risk]
+    return dict(zip(COLUMNS, values))
+
+# Generate a synthetic dataset with a seeded NumPy Generator
+def generate_dataset(n_rows, seed=None):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(generate_columns(n_rows, rng), columns=COLUMNS)
+
+DEFAULT_CHUNK_SIZE = 100_000
+RISK_CATEGORIES = ["Low", "Medium", "High"]
+
+# Seed sequence for chunk `index`, derived from the master entropy
+# so every chunk can be regenerated on its own in any order
+def chunk_seed(entropy, index):
+    return np.random.SeedSequence(entropy, spawn_key=(index,))
+
+# Cast a chunk to compact column types: float32 features and a categorical Risk
+def to_typed_frame(columns):
+    df = pd.DataFrame({name: columns[name].astype(np.float32) for name in FEATURE_COLUMNS})
+    df["Risk"] = pd.Categorical(columns["Risk"], categories=RISK_CATEGORIES)
+    return df
+
+# Yield the dataset as fixed-size typed DataFrame chunks
+# Only one chunk is held in memory at a time, whatever n_rows is
+def iter_chunks(n_rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    entropy = np.random.SeedSequence(seed).entropy
+    for index, start in enumerate(range(0, n_rows, chunk_size)):
+        yield generate_chunk(entropy, index, min(chunk_size, n_rows - start))
+
+# Generate chunk `index` of a dataset seeded with `entropy`
+def generate_chunk(entropy, index, n_rows):
+    rng = np.random.default_rng(chunk_seed(entropy, index))
+    return to_typed_frame(generate_columns(n_rows, rng))
+
+# Arrow schema matching to_typed_frame
+def arrow_schema():
+    import pyarrow as pa
+    fields = [pa.field(name, pa.float32()) for name in FEATURE_COLUMNS]
+    fields.append(pa.field("Risk", pa.dictionary(pa.int8(), pa.string())))
+    return pa.schema(fields)
+
+# Work out the output format from the file extension
+def infer_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return "parquet"
+    elif ext in (".arrow", ".feather", ".ipc"):
+        return "arrow"
+    elif ext == ".csv":
+        return "csv"
+    else:
+        raise ValueError(f"Cannot infer output format from '{path}', use .csv, .parquet or .arrow")
+
+# Write a sequence of typed chunks to a CSV, Parquet or Arrow IPC file
+def write_chunks(chunks, path, fmt=None):
+    fmt = fmt or infer_format(path)
+    rows = 0
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=(i == 0))
+                rows += len(chunk)
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    elif fmt == "arrow":
+        writer = pa.ipc.new_file(path, schema)
+    else:
+        raise ValueError(f"Unknown output format: {fmt}")
+    try:
+        for chunk in chunks:
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+# Stream n_rows of synthetic data to disk with bounded memory
+def write_dataset(path, n_rows, chunk_size=DEFAULT_CHUNK_SIZE, seed=None, fmt=None):
+    return write_chunks(iter_chunks(n_rows, chunk_size, seed), path, fmt)
+
+FORMAT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Generate one shard and write it as its own part file
+def write_shard(out_dir, entropy, index, n_rows, fmt):
+    filename = f"part-{index:05d}{FORMAT_EXTENSIONS[fmt]}"
+    write_chunks([generate_chunk(entropy, index, n_rows)], os.path.join(out_dir, filename), fmt)
+    return {"index": index, "file": filename, "rows": n_rows}
+
+# Generate n_rows across a process pool as part files plus a manifest.json
+# Shard i always uses the seed derived from (seed, i), so the merged output
+# depends only on seed and shard_size, never on the number of workers
+def write_sharded(out_dir, n_rows, shard_size=DEFAULT_CHUNK_SIZE, seed=None, fmt="parquet", workers=None):
+    if fmt not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    entropy = np.random.SeedSequence(seed).entropy
+    sizes = [min(shard_size, n_rows - start) for start in range(0, n_rows, shard_size)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(write_shard, out_dir, entropy, index, size, fmt) for index, size in enumerate(sizes)]
+        parts = [future.result() for future in futures]
+
+    manifest = {
+        "rows": n_rows,
+        "shard_size": shard_size,
+        "seed": seed,
+        "entropy": entropy,
+        "format": fmt,
+        "columns": COLUMNS,
+        "parts": parts,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+# Part file paths listed in a manifest, in shard order
+def read_manifest(out_dir):
+    with open(os.path.join(out_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    return [os.path.join(out_dir, part["file"]) for part in manifest["parts"]]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the synthetic fire risk dataset")
+    parser.add_argument("--rows", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="fire_risk_dataset.csv")
+    parser.add_argument("--stream", action="store_true", help="write in fixed-size chunks with bounded memory")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default=None)
+    parser.add_argument("--shards-dir", default=None, help="write part files and a manifest to this directory using a process pool")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.shards_dir:
+        manifest = write_sharded(args.shards_dir, args.rows, args.chunk_size, args.seed, args.format or "parquet", args.workers)
+        print(f"Wrote {manifest['rows']} rows in {len(manifest['parts'])} parts to {args.shards_dir}")
+    elif args.stream:
+        rows = write_dataset(args.output, args.rows, args.chunk_size, args.seed, args.format)
+        print(f"Wrote {rows} rows to {args.output}")
+    else:
+        # Generate synthetic dataset
+        df = generate_dataset(args.rows, args.seed)
+
+        # Save to CSV
+        df.to_csv(args.output, index=False)
+
+        # Display first few rows of the dataset
+        print(df.head())
@@ -0,0 +1,115 @@
+import numpy as np
+
+# Model input columns, in the order the models were trained on
+FEATURE_COLUMNS = ["Temp(C)", "Temp(K)", "Humidity", "Pressure", "Soil Moisture", "Smoke Density", "Air Density", "Wind Speed", "FFMC", "DMC", "DC", "ISI", "BUI", "FWI"]
+# The fire weather indices among them
+INDEX_COLUMNS = FEATURE_COLUMNS[8:]
+
+# Raw fields of a sensor reading in Firebase
+SENSOR_FIELDS = ["tempBMP", "humidity", "pressure", "soil", "mq7", "mq5"]
+
+# Coefficients shared by every app so the dashboards and models agree
+ISI_COEFFICIENT = 0.45
+DEFAULT_WIND_SPEED = 7.23
+DEFAULT_PREVIOUS_DMC = 25
+DEFAULT_PREVIOUS_DC = 80
+
+INDEX_NAMES = ["ffmc", "dmc", "dc", "isi", "bui", "fwi", "k"]
+
+# All functions below accept scalars or NumPy arrays (one entry per station)
+
+# Function to calculate Air Density (kg/m³) from pressure in hPa
+def calculate_air_density(pressure, temp_c):
+    return np.asarray(pressure) * 100 / (287.05 * (np.asarray(temp_c) + 273.15))
+
+# Function to calculate FFMC (Fine Fuel Moisture Code)
+def calculate_ffmc(temp_c, humidity, wind_speed):
+    return (59.5 * (1 - (np.asarray(humidity) / 100))) + (np.asarray(temp_c) - 10) * 0.25 + np.asarray(wind_speed) * 0.5
+
+# Function to calculate the daily DMC increment K
+def calculate_dmc_factor(temp_c, humidity):
+    return (0.36 * (np.asarray(temp_c) + 2)) * (1 - (np.asarray(humidity) / 100.0)) * (12 / 30.0)
+
+# Function to calculate DMC (Duff Moisture Code)
+def calculate_dmc(previous_dmc, temp_c, humidity):
+    return np.asarray(previous_dmc) + calculate_dmc_factor(temp_c, humidity)
+
+# Function to calculate DC (Drought Code)
+def calculate_dc(previous_dc, temp_c):
+    return np.asarray(previous_dc) + 0.36 * (np.asarray(temp_c) + 2.8)
+
+# Function to calculate ISI (Initial Spread Index)
+def calculate_isi(ffmc, wind_speed):
+    return ISI_COEFFICIENT * np.exp(0.05039 * np.asarray(ffmc)) * (1 + (np.power(wind_speed, 1.5) / 100))
+
+# Function to calculate BUI (Buildup Index)
+def calculate_bui(dmc, dc):
+    dmc = np.asarray(dmc, dtype=float)
+    dc = np.asarray(dc, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        low = (0.8 * dmc * dc) / (dmc + 0.4 * dc)
+        high = dmc - (1 - (0.8 * dc) / (dmc + 0.4 * dc)) * (0.92 + (0.0114 * dmc) ** 1.7)
+    return np.where(dmc <= 0.4 * dc, low, high)
+
+# Function to calculate FWI (Fire Weather Index)
+def calculate_fwi(isi, bui):
+    bui = np.asarray(bui, dtype=float)
+    with np.errstate(invalid="ignore", over="ignore"):
+        ab = np.where(bui <= 80, 0.626 * np.maximum(bui, 0) ** 0.809 + 2, 1000 / (25 + 108.64 * np.exp(-0.023 * bui)))
+    return 0.1 * np.asarray(isi) * ab
+
+# Calculate every index for N stations at once
+def compute_indices(temp_c, humidity, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+    ffmc = calculate_ffmc(temp_c, humidity, wind_speed)
+    k = calculate_dmc_factor(temp_c, humidity)
+    dmc = calculate_dmc(previous_dmc, temp_c, humidity)
+    dc = calculate_dc(previous_dc, temp_c)
+    isi = calculate_isi(ffmc, wind_speed)
+    bui = calculate_bui(dmc, dc)
+    fwi = calculate_fwi(isi, bui)
+    return {"ffmc": ffmc, "dmc": dmc, "dc": dc, "isi": isi, "bui": bui, "fwi": fwi, "k": k}
+
+# Clip at zero and round to 2 decimals, as the dashboards display them
+def round_indices(indices):
+    return {name: np.round(np.maximum(value, 0), 2) for name, value in indices.items()}
+
+# Scalar convenience wrapper for a single reading
+def compute_indices_scalar(temp_c, humidity, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+    indices = compute_indices(temp_c, humidity, wind_speed, previous_dmc, previous_dc)
+    return {name: float(value) for name, value in indices.items()}
+
+# Calculate the rounded model features for N stations, keyed by dataset column name
+def compute_features(temp_c, humidity, pressure, soil_moisture, smoke_density, wind_speed=DEFAULT_WIND_SPEED,
+                     previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+    temp_c = np.asarray(temp_c, dtype=float)
+    indices = round_indices(compute_indices(temp_c, humidity, wind_speed, previous_dmc, previous_dc))
+    shape = temp_c.shape
+    return {
+        "Temp(C)": temp_c,
+        "Temp(K)": np.round(temp_c + 273.15, 2),
+        "Humidity": np.broadcast_to(np.asarray(humidity, dtype=float), shape),
+        "Pressure": np.broadcast_to(np.asarray(pressure, dtype=float), shape),
+        "Soil Moisture": np.broadcast_to(np.asarray(soil_moisture, dtype=float), shape),
+        "Smoke Density": np.broadcast_to(np.asarray(smoke_density, dtype=float), shape),
+        "Air Density": np.round(np.maximum(calculate_air_density(pressure, temp_c), 0), 2),
+        "Wind Speed": np.broadcast_to(np.asarray(wind_speed, dtype=float), shape),
+        "FFMC": indices["ffmc"],
+        "DMC": indices["dmc"],
+        "DC": indices["dc"],
+        "ISI": indices["isi"],
+        "BUI": indices["bui"],
+        "FWI": indices["fwi"],
+    }
+
+# Stack features into the (N, 14) matrix the models were trained on
+def feature_matrix(features):
+    return np.column_stack([np.atleast_1d(features[name]) for name in FEATURE_COLUMNS])
+
+# Raw readings (dicts with SENSOR_FIELDS) -> one float array per field
+def readings_to_columns(readings):
+    return {field: np.array([float(reading[field]) for reading in readings]) for field in SENSOR_FIELDS}
+
+# Model features for a batch of raw sensor columns
+def features_from_columns(columns, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+    return compute_features(columns["tempBMP"], columns["humidity"], columns["pressure"], columns["soil"], columns["mq7"],
+                            wind_speed, previous_dmc, previous_dc)
@@ -0,0 +1,252 @@
+import atexit
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from fire_indices import SENSOR_FIELDS
+
+HISTORY_FIELDS = SENSOR_FIELDS + ["ffmc", "dmc", "dc", "isi", "bui", "fwi"]
+DEFAULT_CAPACITY = 2880
+# Rolling windows in readings (about 1 min, 5 min and 30 min at one reading per 5 s)
+DEFAULT_WINDOWS = (12, 60, 360)
+DEFAULT_HISTORY_PATH = "sensor_history.npz"
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+
+# Running sum, position-weighted sum and min/max deques for one window.
+# Positions run 0..n-1 from oldest to newest inside the window, so the trend
+# is the least-squares slope per reading.
+class _Window:
+    def __init__(self, size, n_fields):
+        self.size = size
+        self.n = 0
+        self.sum = np.zeros(n_fields)
+        self.weighted = np.zeros(n_fields)
+        self.minima = [deque() for _ in range(n_fields)]
+        self.maxima = [deque() for _ in range(n_fields)]
+
+    def push(self, seq, row, oldest):
+        if oldest is not None:
+            self.weighted += oldest - self.sum
+            self.sum -= oldest
+            self.n -= 1
+        self.weighted += self.n * row
+        self.sum += row
+        self.n += 1
+        for i, value in enumerate(row.tolist()):
+            lows, highs = self.minima[i], self.maxima[i]
+            while lows and lows[-1][1] >= value:
+                lows.pop()
+            lows.append((seq, value))
+            while highs and highs[-1][1] <= value:
+                highs.pop()
+            highs.append((seq, value))
+            while lows[0][0] <= seq - self.size:
+                lows.popleft()
+            while highs[0][0] <= seq - self.size:
+                highs.popleft()
+
+    # Exact sums from the window's rows, to drop accumulated rounding error
+    def resync(self, rows):
+        self.sum = rows.sum(axis=0)
+        self.weighted = (np.arange(len(rows))[:, None] * rows).sum(axis=0)
+
+    def aggregates(self):
+        n = self.n
+        mean = self.sum / n
+        if n > 1:
+            sum_i = n * (n - 1) / 2
+            sum_ii = (n - 1) * n * (2 * n - 1) / 6
+            trend = (n * self.weighted - sum_i * self.sum) / (n * sum_ii - sum_i ** 2)
+        else:
+            trend = np.zeros_like(mean)
+        minimum = np.array([lows[0][1] for lows in self.minima])
+        maximum = np.array([highs[0][1] for highs in self.maxima])
+        return mean, minimum, maximum, trend
+
+
+# Last `capacity` readings of one station in a fixed (capacity, fields) array
+# with O(1) append and rolling mean/min/max/trend over each window
+class StationHistory:
+    def __init__(self, fields=HISTORY_FIELDS, capacity=DEFAULT_CAPACITY, windows=DEFAULT_WINDOWS):
+        if any(size < 1 or size > capacity for size in windows):
+            raise ValueError(f"windows must be between 1 and capacity ({capacity})")
+        self.fields = list(fields)
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, len(self.fields)))
+        self.version = None
+        self._seq = 0
+        self._window_state = {size: _Window(size, len(self.fields)) for size in self.windows}
+
+    def __len__(self):
+        return min(self._seq, self.capacity)
+
+    def _row(self, values):
+        if isinstance(values, dict):
+            return np.array([float(values[field]) for field in self.fields])
+        row = np.asarray(values, dtype=float)
+        if row.shape != (len(self.fields),):
+            raise ValueError(f"expected {len(self.fields)} values, got shape {row.shape}")
+        return row
+
+    # Add one reading (dict keyed by field, or values in field order).
+    # A reading with the same `version` as the last one is ignored.
+    def append(self, values, timestamp=None, version=None):
+        if version is not None and version == self.version:
+            return False
+        row = self._row(values)
+        seq = self._seq
+        for size, window in self._window_state.items():
+            oldest = self.values[(seq - size) % self.capacity].copy() if seq >= size else None
+            window.push(seq, row, oldest)
+        slot = seq % self.capacity
+        self.values[slot] = row
+        self.times[slot] = time.time() if timestamp is None else timestamp
+        self._seq += 1
+        self.version = version
+        if self._seq % self.capacity == 0:
+            for size, window in self._window_state.items():
+                window.resync(self.series(last=size)[1])
+        return True
+
+    # Timestamps and values of the last `last` readings, oldest first
+    def series(self, field=None, last=None):
+        n = len(self) if last is None else min(last, len(self))
+        index = np.arange(self._seq - n, self._seq) % self.capacity
+        values = self.values[index]
+        if field is not None:
+            values = values[:, self.fields.index(field)]
+        return self.times[index], values
+
+    # {field: {"mean", "min", "max", "trend"}} over the last `window` readings
+    def aggregates(self, window):
+        if window not in self._window_state:
+            raise ValueError(f"unknown window {window}, expected one of {self.windows}")
+        if self._seq == 0:
+            return {}
+        mean, minimum, maximum, trend = self._window_state[window].aggregates()
+        return {
+            field: {"mean": float(mean[i]), "min": float(minimum[i]), "max": float(maximum[i]), "trend": float(trend[i])}
+            for i, field in enumerate(self.fields)
+        }
+
+
+# StationHistory per station, saved to one .npz file every flush_interval seconds
+class HistoryStore:
+    def __init__(self, path=DEFAULT_HISTORY_PATH, fields=HISTORY_FIELDS, capacity=DEFAULT_CAPACITY, windows=DEFAULT_WINDOWS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.fields = list(fields)
+        self.capacity = capacity
+        self.windows = tuple(windows)
+        self.flush_interval = flush_interval
+        self.failed_flushes = 0
+        self._stations = {}
+        self._dirty = False
+        self._appended = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        if path is not None:
+            self._load()
+
+    def __contains__(self, station):
+        with self._lock:
+            return station in self._stations
+
+    def stations(self):
+        with self._lock:
+            return sorted(self._stations)
+
+    def get(self, station):
+        with self._lock:
+            history = self._stations.get(station)
+            if history is None:
+                history = self._stations[station] = StationHistory(self.fields, self.capacity, self.windows)
+            return history
+
+    def append(self, station, values, timestamp=None, version=None):
+        history = self.get(station)
+        with self._lock:
+            added = history.append(values, timestamp, version)
+            self._dirty |= added
+            self._appended += added
+        return added
+
+    def series(self, station, field=None, last=None):
+        history = self.get(station)
+        with self._lock:
+            return history.series(field, last)
+
+    def aggregates(self, station, window):
+        history = self.get(station)
+        with self._lock:
+            return history.aggregates(window)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                meta = json.loads(str(data["meta"]))
+                for i, station in enumerate(meta["stations"]):
+                    history = StationHistory(self.fields, self.capacity, self.windows)
+                    columns = [meta["fields"].index(field) for field in self.fields]
+                    times, values = data[f"times_{i}"], data[f"values_{i}"]
+                    for timestamp, row in zip(times[-self.capacity:], values[-self.capacity:, columns]):
+                        history.append(row, timestamp)
+                    self._stations[station] = history
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Could not read history from {self.path}: {e}")
+
+    # Write every station's history, oldest reading first, if anything changed.
+    # The store stays dirty until the file is replaced, so a failed write is retried.
+    def flush(self):
+        with self._lock:
+            if not self._dirty or self.path is None:
+                return False
+            appended = self._appended
+            stations = sorted(self._stations)
+            arrays = {"meta": np.array(json.dumps({"fields": self.fields, "stations": stations}))}
+            for i, station in enumerate(stations):
+                arrays[f"times_{i}"], arrays[f"values_{i}"] = self._stations[station].series()
+        tmp_path = self.path + ".tmp"
+        try:
+            buffer = io.BytesIO()
+            np.savez(buffer, **arrays)
+            with open(tmp_path, "wb") as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"Failed to flush history: {e}")
+            return False
+        with self._lock:
+            # Stay dirty if readings were appended while this flush was running
+            self._dirty = self._appended != appended
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"History flush loop error: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def close(self):
+        self._stop.set()
+        self.flush()
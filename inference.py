@@ -0,0 +1,40 @@
+import numpy as np
+
+from metrics import timer
+from model_registry import default_registry
+
+RISK_LABELS = np.array(["Low", "Medium", "High", "Extreme"])
+RISK_MAP = {label: code for code, label in enumerate(RISK_LABELS)}
+
+# Same order as the Counter vote in dashboard.py, ties go to the earliest model
+ENSEMBLE_ORDER = ["xgboost", "decision_tree", "random_forest", "catboost", "lightgbm"]
+
+# Run one model over the whole (N, 14) batch and return integer risk codes
+def predict_codes(model, X):
+    return np.asarray(model.predict(X)).reshape(len(X)).astype(np.int64)
+
+# Vectorized Counter(...).most_common(1) over the model axis of an (M, N) code matrix
+# Returns the winning code per station and how many models voted for it
+def majority_vote(codes):
+    codes = np.asarray(codes)
+    counts = (codes[:, None, :] == codes[None, :, :]).sum(axis=1)
+    best = counts.max(axis=0)
+    first = np.argmax(counts == best, axis=0)
+    return codes[first, np.arange(codes.shape[1])], best
+
+# Score N stations with every model once and take the majority vote
+def predict_batch(X, registry=None, models=ENSEMBLE_ORDER):
+    registry = registry or default_registry()
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    codes = {}
+    for name in models:
+        with timer(f"predict_{name}"):
+            codes[name] = predict_codes(registry.get(name), X)
+    vote_codes, vote_count = majority_vote(np.stack([codes[name] for name in models]))
+    return {
+        "codes": codes,
+        "labels": {name: RISK_LABELS[code] for name, code in codes.items()},
+        "vote_codes": vote_codes,
+        "vote": RISK_LABELS[vote_codes],
+        "vote_count": vote_count,
+    }
@@ -0,0 +1,228 @@
+import copy
+import json
+import os
+import threading
+from collections import namedtuple
+
+DEFAULT_START_TIMEOUT = 10.0
+
+# Same fields as firebase_admin.db.Event
+Event = namedtuple("Event", ["event_type", "path", "data"])
+
+
+def _split(path):
+    return [part for part in path.strip("/").split("/") if part]
+
+# Apply a Firebase-style "put" or "patch" event at `path` to a nested dict snapshot
+def apply_event(snapshot, event_type, path, data):
+    parts = _split(path)
+    if not parts:
+        if event_type == "patch" and isinstance(snapshot, dict) and isinstance(data, dict):
+            return {**snapshot, **data}
+        return copy.deepcopy(data)
+    snapshot = dict(snapshot) if isinstance(snapshot, dict) else {}
+    key = parts[0]
+    child = apply_event(snapshot.get(key), event_type, "/".join(parts[1:]), data)
+    if child is None:
+        snapshot.pop(key, None)
+    else:
+        snapshot[key] = child
+    return snapshot
+
+
+# Firebase Realtime Database change stream (one streaming connection per path)
+class FirebaseBackend:
+    def listen(self, path, callback):
+        from firebase_admin import db
+        return db.reference(path).listen(callback)
+
+
+class _Listener:
+    def __init__(self, owner, path, callback):
+        self.owner = owner
+        self.path = path
+        self.callback = callback
+
+    def close(self):
+        self.owner._remove(self)
+
+
+# In-process stand-in for tests and offline runs: set()/update() emit events
+# to every listener whose path contains the changed path
+class LocalBackend:
+    def __init__(self, data=None):
+        self.data = data or {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def listen(self, path, callback):
+        listener = _Listener(self, path, callback)
+        with self._lock:
+            self._listeners.append(listener)
+        callback(Event("put", "/", self.get(path)))
+        return listener
+
+    def _remove(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def get(self, path):
+        node = self.data
+        for part in _split(path):
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return copy.deepcopy(node)
+
+    def set(self, path, data):
+        self._emit("put", path, data)
+
+    def update(self, path, data):
+        self._emit("patch", path, data)
+
+    def _emit(self, event_type, path, data):
+        with self._lock:
+            self.data = apply_event(self.data, event_type, path, data) or {}
+            listeners = list(self._listeners)
+        changed = _split(path)
+        for listener in listeners:
+            root = _split(listener.path)
+            if changed[:len(root)] == root:
+                listener.callback(Event(event_type, "/" + "/".join(changed[len(root):]), data))
+            elif root[:len(changed)] == changed:
+                listener.callback(Event("put", "/", self.get(listener.path)))
+
+
+# Watches a JSON file holding the whole database tree and emits a "put" for
+# the listened path whenever the file's mtime changes. A missing file reads as
+# an empty node, so listeners get their initial event straight away.
+class FileBackend:
+    def __init__(self, filename, interval=0.5):
+        self.filename = filename
+        self.interval = interval
+
+    def _read(self, path):
+        try:
+            with open(self.filename) as f:
+                node = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for part in _split(path):
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def listen(self, path, callback):
+        return _FileWatch(self, path, callback)
+
+
+class _FileWatch:
+    def __init__(self, backend, path, callback):
+        self.backend = backend
+        self.path = path
+        self.callback = callback
+        self._stop = threading.Event()
+        # None once the file is seen missing, False before the first poll
+        self._mtime = False
+        self._poll()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _poll(self):
+        try:
+            mtime = os.stat(self.backend.filename).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self.callback(Event("put", "/", self.backend._read(self.path)))
+
+    def _run(self):
+        while not self._stop.wait(self.backend.interval):
+            self._poll()
+
+    def close(self):
+        self._stop.set()
+
+
+# Latest reading per station, kept current from a backend's change events.
+# With multi_station=False the listened node is a single reading stored under
+# `station`; otherwise each child of the node is a station.
+# Subscribers are called with (station, reading) only when a reading changes.
+class SensorFeed:
+    def __init__(self, backend, path="/sensor", multi_station=False, station="sensor"):
+        self.backend = backend
+        self.path = path
+        self.multi_station = multi_station
+        self.station = station
+        self.version = 0
+        self.events = 0
+        self._snapshot = None
+        self._readings = {}
+        self._versions = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._registration = None
+
+    # Subscribe and wait up to `timeout` seconds for the initial snapshot, so
+    # the first latest() after start() sees existing data
+    def start(self, timeout=DEFAULT_START_TIMEOUT):
+        if self._registration is None:
+            self._registration = self.backend.listen(self.path, self._on_event)
+        if not self._ready.wait(timeout):
+            print(f"No initial snapshot of {self.path} after {timeout:g} s, continuing without it")
+        return self
+
+    def stop(self):
+        if self._registration is not None:
+            self._registration.close()
+            self._registration = None
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _on_event(self, event):
+        with self._lock:
+            self.events += 1
+            self._snapshot = apply_event(self._snapshot, event.event_type, event.path, event.data)
+            if self.multi_station:
+                current = self._snapshot if isinstance(self._snapshot, dict) else {}
+            else:
+                current = {self.station: self._snapshot} if self._snapshot is not None else {}
+            changed = [station for station in set(current) | set(self._readings)
+                       if current.get(station) != self._readings.get(station)]
+            for station in changed:
+                if station in current:
+                    self._readings[station] = copy.deepcopy(current[station])
+                    self._versions[station] = self._versions.get(station, 0) + 1
+                else:
+                    self._readings.pop(station, None)
+            if changed:
+                self.version += 1
+            updates = [(station, self._readings.get(station)) for station in changed]
+        self._ready.set()
+        for station, reading in updates:
+            for callback in self._subscribers:
+                callback(station, reading)
+
+    # Latest reading for a station (the single station by default), or None
+    def latest(self, station=None):
+        with self._lock:
+            reading = self._readings.get(station or self.station)
+            return copy.deepcopy(reading)
+
+    # Change counter for one station, bumped only when its reading changes
+    def station_version(self, station=None):
+        with self._lock:
+            return self._versions.get(station or self.station, 0)
+
+    def stations(self):
+        with self._lock:
+            return sorted(self._readings)
+
+    def snapshot(self):
+        with self._lock:
+            return copy.deepcopy(self._readings)
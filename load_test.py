@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import numpy as np
+
+# Random reading in the ranges the dashboard tiles are tuned for
+def random_reading(station):
+    return {
+        "station": station,
+        "tempBMP": round(random.uniform(10, 50), 2),
+        "humidity": round(random.uniform(10, 90), 2),
+        "pressure": round(random.uniform(900, 1020), 2),
+        "soil": round(random.uniform(0, 1000), 2),
+        "mq7": round(random.uniform(0, 1000), 2),
+        "mq5": round(random.uniform(0, 800), 2),
+    }
+
+
+# One keep-alive connection sending requests back to back until the deadline
+async def _worker(host, port, deadline, latencies, errors, index):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps(random_reading(f"station-{index}")).encode("utf-8")
+            request = (f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = (await reader.readline()).split(b" ")[1]
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            if status == b"200":
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors.append(status.decode())
+    finally:
+        writer.close()
+
+
+# Drive the scoring service with `concurrency` connections for `duration` seconds
+async def run_load_test(host="127.0.0.1", port=8080, concurrency=32, duration=10.0):
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_worker(host, port, deadline, latencies, errors, i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test for scoring_service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load_test(args.host, args.port, args.concurrency, args.duration))
+    p50, p99 = (f"{report[name]:.2f} ms" if report[name] is not None else "n/a" for name in ["p50_ms", "p99_ms"])
+    print(f"{report['requests']} requests ({report['errors']} errors) in {report['seconds']:.1f} s  "
+          f"throughput {report['throughput']:.0f} req/s  p50 {p50}  p99 {p99}")
@@ -0,0 +1,291 @@
+import atexit
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Environment switches, read once by configure_from_env()
+ENV_ENABLED = "FOREST_FIRE_METRICS"
+ENV_PORT = "FOREST_FIRE_METRICS_PORT"
+ENV_HOST = "FOREST_FIRE_METRICS_HOST"
+ENV_FILE = "FOREST_FIRE_METRICS_FILE"
+ENV_PROFILE = "FOREST_FIRE_PROFILE"
+ENV_PROFILE_INTERVAL = "FOREST_FIRE_PROFILE_INTERVAL"
+
+METRIC_NAME = "forest_fire_stage_seconds"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_DUMP_INTERVAL = 15.0
+DEFAULT_PROFILE_INTERVAL = 0.01
+DEFAULT_PROFILE_FILE = "profile.collapsed"
+
+
+# Cumulative-bucket latency histogram, in the layout Prometheus expects
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    # Upper bound of the bucket holding quantile q
+    def quantile(self, q):
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+# Per-stage latency histograms. While disabled, timer() hands back a shared
+# no-op context manager, so instrumented code pays one attribute check.
+class Metrics:
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.failed_dumps = 0
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._dump_stop = None
+
+    def timer(self, stage):
+        if not self.enabled:
+            return _NOOP
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    # {stage: count, mean, p50, p99, max} in seconds (quantiles are bucket bounds)
+    def summary(self):
+        with self._lock:
+            return {
+                stage: {"count": h.count, "mean": h.sum / h.count, "p50": h.quantile(0.5), "p99": h.quantile(0.99), "max": h.max}
+                for stage, h in sorted(self._histograms.items()) if h.count
+            }
+
+    # Prometheus text exposition format
+    def render(self):
+        lines = [f"# HELP {METRIC_NAME} Latency of each scoring pipeline stage.", f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            for stage, h in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    # dump() for the background thread: errors are counted and logged, not raised
+    def _dump_logged(self, path):
+        try:
+            self.dump(path)
+        except Exception as e:
+            self.failed_dumps += 1
+            print(f"Failed to write metrics to {path}: {e}")
+
+    # Rewrite `path` every `interval` seconds and once more at exit
+    def start_dump(self, path, interval=DEFAULT_DUMP_INTERVAL):
+        if self._dump_stop is None:
+            self._dump_stop = threading.Event()
+
+            def run():
+                while not self._dump_stop.wait(interval):
+                    self._dump_logged(path)
+            threading.Thread(target=run, daemon=True).start()
+            atexit.register(self._dump_logged, path)
+        return self
+
+    # Serve GET /metrics from a background thread, on localhost unless told otherwise
+    def serve(self, port, host=DEFAULT_HOST):
+        if self._server is None:
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split("?")[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = metrics.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args):
+                    pass
+
+            self._server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+
+# Statistical profiler: a background thread samples every other thread's
+# stack every `interval` seconds and counts them as collapsed stacks
+# ("file:function;file:function count", the flame graph input format)
+class SamplingProfiler:
+    def __init__(self, interval=DEFAULT_PROFILE_INTERVAL, path=None, dump_interval=60.0, max_depth=64):
+        self.interval = interval
+        self.path = path
+        self.dump_interval = dump_interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.failed_dumps = 0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            with self._lock:
+                self.stacks[";".join(reversed(names))] += 1
+        with self._lock:
+            self.samples += 1
+
+    # Samples until stopped, rewriting `path` every dump_interval seconds if set
+    def _run(self):
+        next_dump = time.monotonic() + self.dump_interval
+        while not self._stop.wait(self.interval):
+            self._sample()
+            if self.path and time.monotonic() >= next_dump:
+                self._dump_logged()
+                next_dump = time.monotonic() + self.dump_interval
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            if self.path:
+                atexit.register(self._dump_logged)
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # Most sampled leaf functions with their share of samples
+    def top(self, n=20):
+        leaves = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            total = sum(self.stacks.values())
+        return [(name, count / total) for name, count in leaves.most_common(n)] if total else []
+
+    def dump(self, path=None):
+        path = path or self.path or DEFAULT_PROFILE_FILE
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+    def _dump_logged(self):
+        try:
+            self.dump(self.path)
+        except Exception as e:
+            self.failed_dumps += 1
+            print(f"Failed to write profile to {self.path}: {e}")
+
+
+METRICS = Metrics()
+PROFILER = None
+
+
+def timer(stage):
+    return METRICS.timer(stage)
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+# Turn metrics, their export and the profiler on from environment variables:
+#   FOREST_FIRE_METRICS=1            keep stage histograms
+#   FOREST_FIRE_METRICS_PORT=9100    serve them at http://127.0.0.1:9100/metrics
+#   FOREST_FIRE_METRICS_HOST=addr    interface to serve on instead (e.g. 0.0.0.0 for all)
+#   FOREST_FIRE_METRICS_FILE=path    rewrite a Prometheus text file every 15 s
+#   FOREST_FIRE_PROFILE=path|1       sample stacks into a collapsed-stack file (rewritten every minute)
+#   FOREST_FIRE_PROFILE_INTERVAL=s   sampling interval (default 0.01)
+def configure_from_env():
+    global PROFILER
+    METRICS.enabled = _env_flag(ENV_ENABLED) or bool(os.environ.get(ENV_PORT) or os.environ.get(ENV_FILE))
+    if os.environ.get(ENV_PORT):
+        METRICS.serve(int(os.environ[ENV_PORT]), os.environ.get(ENV_HOST) or DEFAULT_HOST)
+    if os.environ.get(ENV_FILE):
+        METRICS.start_dump(os.environ[ENV_FILE])
+    if _env_flag(ENV_PROFILE) and PROFILER is None:
+        value = os.environ[ENV_PROFILE].strip()
+        path = DEFAULT_PROFILE_FILE if value.lower() in ("1", "true", "yes", "on") else value
+        PROFILER = SamplingProfiler(float(os.environ.get(ENV_PROFILE_INTERVAL, DEFAULT_PROFILE_INTERVAL)), path).start()
+    return METRICS
@@ -0,0 +1,172 @@
+import argparse
+import datetime
+import json
+import os
+import struct
+import sys
+import zlib
+
+import numpy as np
+
+from compiled_trees import ARRAY_NAMES, CompiledEnsemble, CompiledForest
+from inference import RISK_LABELS
+from model_registry import file_sha256
+
+# File layout (all integers little-endian):
+#   magic         8 bytes   b"FFMODEL\0"
+#   version       uint32
+#   header crc32  uint32
+#   header size   uint64
+#   header        UTF-8 JSON: feature order, label map, models and their arrays
+#   blobs         raw C-ordered arrays, each starting on an ALIGNMENT boundary
+# Array offsets in the header are absolute, so readers can map the file once
+# and view every array in place.
+MAGIC = b"FFMODEL\0"
+FORMAT_VERSION = 1
+PRELUDE = struct.Struct("<8sIIQ")
+ALIGNMENT = 64
+DEFAULT_PATH = "fire_risk_models.ffm"
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# Write a CompiledEnsemble as a versioned, memory-mappable artifact
+def write_artifact(path, ensemble, feature_names=None, labels=RISK_LABELS, sources=None):
+    if feature_names is None:
+        from fire_indices import FEATURE_COLUMNS as feature_names
+    models, blobs = {}, []
+    for name, forest in ensemble.forests.items():
+        arrays = {}
+        for array_name, array in forest.arrays().items():
+            array = np.ascontiguousarray(array)
+            arrays[array_name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "nbytes": array.nbytes,
+                "crc32": zlib.crc32(array),
+            }
+            blobs.append((arrays[array_name], array))
+        models[name] = {"meta": forest.meta(), "arrays": arrays}
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "feature_names": list(feature_names),
+        "labels": {str(code): str(label) for code, label in enumerate(labels)},
+        "sources": sources or {},
+        "models": models,
+    }
+
+    # Offsets depend on the header size and the header contains the offsets,
+    # so grow the reserved header space until it fits
+    reserved = ALIGNMENT
+    while True:
+        offset = _align(PRELUDE.size + reserved)
+        for info, array in blobs:
+            info["offset"] = offset
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) <= reserved:
+            break
+        reserved = _align(len(encoded))
+    encoded = encoded.ljust(reserved, b" ")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(PRELUDE.pack(MAGIC, FORMAT_VERSION, zlib.crc32(encoded), len(encoded)))
+        f.write(encoded)
+        for info, array in blobs:
+            f.write(b"\0" * (info["offset"] - f.tell()))
+            f.write(array)
+    os.replace(tmp_path, path)
+    return header
+
+
+# Parse and check the prelude and JSON header
+def read_header(path):
+    with open(path, "rb") as f:
+        magic, version, header_crc, size = PRELUDE.unpack(f.read(PRELUDE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a fire risk model artifact")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        encoded = f.read(size)
+    if zlib.crc32(encoded) != header_crc:
+        raise ValueError(f"{path} header checksum mismatch")
+    return json.loads(encoded)
+
+
+# Open an artifact as a CompiledEnsemble whose arrays are views into one
+# read-only memory map, so processes on the same host share the pages.
+# verify checks every array's crc32 on the mapped pages, which reads the
+# whole file once without copying it.
+def load_artifact(path, verify=True, mmap=True):
+    header = read_header(path)
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    else:
+        with open(path, "rb") as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+    forests = {}
+    for name, model in header["models"].items():
+        arrays = {}
+        for array_name in ARRAY_NAMES:
+            info = model["arrays"][array_name]
+            array = np.ndarray(tuple(info["shape"]), dtype=np.dtype(info["dtype"]), buffer=buffer, offset=info["offset"])
+            if verify and zlib.crc32(array) != info["crc32"]:
+                raise ValueError(f"{path}: checksum mismatch in {name}/{array_name}")
+            arrays[array_name] = array
+        forests[name] = CompiledForest.from_arrays(model["meta"], arrays)
+
+    labels = {int(code): label for code, label in header["labels"].items()}
+    return CompiledEnsemble(forests, header["feature_names"], labels)
+
+
+# Models whose pickle in base_dir no longer matches the sha256 recorded when the
+# artifact was built. Pickles that are not present (artifact-only deployments)
+# are not checked.
+def stale_sources(header, base_dir=None):
+    from model_registry import BASE_DIR
+    base_dir = base_dir or BASE_DIR
+    stale = []
+    for name, source in header.get("sources", {}).items():
+        path = os.path.join(base_dir, source["file"])
+        if os.path.exists(path) and file_sha256(path) != source["sha256"]:
+            stale.append(name)
+    return stale
+
+
+# Compile the pickled models and write them as one artifact
+def convert_pickles(path=DEFAULT_PATH, registry=None):
+    from compiled_trees import compile_registry
+    from model_registry import default_registry
+    registry = registry or default_registry()
+    ensemble = compile_registry(registry)
+    sources = {}
+    for name in ensemble.names:
+        source = registry.stats()[name]["path"]
+        sources[name] = {"file": os.path.basename(source), "sha256": file_sha256(source)}
+    return write_artifact(path, ensemble, sources=sources)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the pickled models to a memory-mappable artifact")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="compile the .pkl models into an artifact")
+    convert.add_argument("--output", default=DEFAULT_PATH)
+    check = sub.add_parser("verify", help="check an artifact's checksums and that its source pickles are unchanged")
+    check.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        header = convert_pickles(args.output)
+        print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.2f} MB, {len(header['models'])} models)")
+    else:
+        ensemble = load_artifact(args.path, verify=True)
+        print(f"{args.path}: checksums OK, models {', '.join(ensemble.names)}")
+        stale = stale_sources(read_header(args.path))
+        if stale:
+            sys.exit(f"{args.path} is stale: {', '.join(stale)} changed since it was built, run convert again")
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Model name -> pickle written by train.py
+MODEL_FILES = {
+    "xgboost": "fire_risk_xgb.pkl",
+    "decision_tree": "decision_tree_model.pkl",
+    "random_forest": "random_forest_model.pkl",
+    "catboost": "catboost_model.pkl",
+    "lightgbm": "lightgbm_model.pkl",
+}
+
+# Hex sha256 of a file, read in 1 MiB blocks
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Resident set size of this process in bytes (Linux only, None elsewhere)
+def resident_memory():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _Entry:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.model = None
+        self.mtime = None
+        self.loads = 0
+        self.load_seconds = None
+        self.memory_bytes = None
+
+
+# Loads each model once, on first use, and shares it across callers
+# A model is reloaded when its file's mtime changes (if check_mtime is set)
+class ModelRegistry:
+    def __init__(self, files=None, base_dir=BASE_DIR, check_mtime=True):
+        files = MODEL_FILES if files is None else files
+        self.check_mtime = check_mtime
+        self._entries = {name: _Entry(os.path.join(base_dir, filename)) for name, filename in files.items()}
+
+    @property
+    def names(self):
+        return list(self._entries)
+
+    def __getitem__(self, name):
+        return self.get(name)
+
+    # Return the model, loading it on first use or when its file changed
+    def get(self, name):
+        entry = self._entries[name]
+        if entry.model is not None and not self.check_mtime:
+            return entry.model
+        mtime = os.stat(entry.path).st_mtime
+        if entry.model is not None and entry.mtime == mtime:
+            return entry.model
+        with entry.lock:
+            if entry.model is None or entry.mtime != mtime:
+                self._load(entry, mtime)
+            return entry.model
+
+    # Force a reload of one model from disk
+    def reload(self, name):
+        entry = self._entries[name]
+        with entry.lock:
+            self._load(entry, os.stat(entry.path).st_mtime)
+        return entry.model
+
+    def _load(self, entry, mtime):
+        rss_before = resident_memory()
+        # Imported here so numpy-only serving paths can import this module without joblib
+        import joblib
+        start = time.perf_counter()
+        model = joblib.load(entry.path)
+        entry.load_seconds = time.perf_counter() - start
+        rss_after = resident_memory()
+        entry.memory_bytes = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+        entry.model = model
+        entry.mtime = mtime
+        entry.loads += 1
+
+    # Load time and resident memory growth per model
+    def stats(self):
+        return {
+            name: {
+                "path": entry.path,
+                "loaded": entry.model is not None,
+                "loads": entry.loads,
+                "load_seconds": entry.load_seconds,
+                "memory_bytes": entry.memory_bytes,
+                "file_bytes": os.path.getsize(entry.path) if os.path.exists(entry.path) else None,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+# Process-wide registry shared by every session and rerun
+def default_registry():
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry()
+        return _default_registry
+
+
+if __name__ == "__main__":
+    registry = default_registry()
+    for name in registry.names:
+        registry.get(name)
+    for name, info in registry.stats().items():
+        memory = f"{info['memory_bytes'] / 1e6:.1f} MB" if info["memory_bytes"] is not None else "n/a"
+        print(f"{name:15s} {info['load_seconds'] * 1000:8.1f} ms  {memory:>10s}  ({info['file_bytes'] / 1e6:.2f} MB on disk)")
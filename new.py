@@ -2,10 +2,12 @@ import streamlit as st
 import joblib
 import numpy as np
 import firebase_admin
-from firebase_admin import credentials, db
+from firebase_admin import credentials
 from twilio.rest import Client
 from streamlit_autorefresh import st_autorefresh
 import datetime
+from fire_indices import INDEX_NAMES, calculate_air_density, compute_indices_scalar
+from ingestion import FirebaseBackend, SensorFeed
 
 # Initialize Firebase only once
 if not firebase_admin._apps:
@@ -44,13 +46,19 @@ st_autorefresh(interval=10000, key="auto_refresh")
 current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 st.info(f"⏱️ Current Time: {current_time}")
 
+# Sensor and index nodes pushed by Firebase change events, shared across reruns
+@st.cache_resource
+def get_feeds():
+    backend = FirebaseBackend()
+    return SensorFeed(backend, '/sensor').start(), SensorFeed(backend, '/fire_indices', station='fire_indices').start()
+
+sensor_feed, indices_feed = get_feeds()
+
 # Fetch sensor data
-sensor_ref = db.reference('/sensor')
-sensor_data = sensor_ref.get()
+sensor_data = sensor_feed.latest()
 
 # Fetch previous DMC and DC (initialize if not present)
-indices_ref = db.reference('/fire_indices')
-indices_data = indices_ref.get() or {}
+indices_data = indices_feed.latest() or {}
 
 # Hardcoded values for initial test
 previous_dmc = 6
@@ -69,31 +77,15 @@ if sensor_data:
 
     # Derived values
     temp_k = temp_c + 273.15
-    air_density = pressure * 100 / (287.05 * temp_k)
+    air_density = calculate_air_density(pressure, temp_c)
     wind_speed = 15
 
     st.write("🌬️ Air Density:", air_density)
     st.write("💨 Wind Speed:", wind_speed)
 
     # Fire weather indices
-    ffmc = (59.5 * (1 - (humidity / 100))) + (temp_c - 10) * 0.25 + wind_speed * 0.5
-    k = (0.36 * (temp_c + 2)) * (1 - (humidity / 100.0)) * (12 / 30.0)
-    dmc = previous_dmc + k
-    dc = previous_dc + 0.36 * (temp_c + 2.8)
-    isi = 0.28 * np.exp(0.05039 * ffmc) * (1 + (np.power(wind_speed, 1.5) / 100))
-
-    if dmc <= 0.4 * dc:
-        bui = (0.8 * dmc * dc) / (dmc + 0.4 * dc)
-    else:
-        bui = dmc - (1 - (0.8 * dc) / (dmc + 0.4 * dc)) * (0.92 + (0.0114 * dmc) ** 1.7)
-
-    if bui <= 80:
-        ab = 0.626 * (bui ** 0.809) + 2
-    else:
-        ab = 1000 / (25 + 108.64 * np.exp(-0.023 * bui))
-
-    B = 0.1 * isi * ab
-    fwi = 11  # You can use formula if you prefer dynamic FWI
+    indices = compute_indices_scalar(temp_c, humidity, wind_speed, previous_dmc, previous_dc)
+    ffmc, dmc, dc, isi, bui, fwi, k = (indices[name] for name in INDEX_NAMES)
 
     st.subheader("🧮 Calculated Fire Weather Indices")
     st.write("🔥 FFMC:", ffmc)
@@ -0,0 +1,203 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from alerts import alert_flags
+from fire_indices import DEFAULT_PREVIOUS_DC, DEFAULT_PREVIOUS_DMC, DEFAULT_WIND_SPEED, FEATURE_COLUMNS, SENSOR_FIELDS, feature_matrix, features_from_columns
+from inference import ENSEMBLE_ORDER, RISK_LABELS, RISK_MAP
+from scoring_service import load_ensemble
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+# Rows of the first worksheet streamed with openpyxl's read-only mode, so
+# only one chunk is held in memory at a time
+def read_xlsx_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    import pandas as pd
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) for name in header]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+# DataFrame chunks of a CSV, XLSX, Parquet or Arrow file
+# (legacy .xls has no streaming reader and is loaded whole before slicing)
+def read_file_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    import pandas as pd
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+    elif ext == ".xlsx":
+        yield from read_xlsx_chunks(path, chunk_size)
+    elif ext == ".xls":
+        df = pd.read_excel(path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    elif ext in (".arrow", ".feather", ".ipc"):
+        import pyarrow as pa
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i).to_pandas()
+    else:
+        raise ValueError(f"Cannot replay '{path}', use .csv, .xlsx, .parquet or .arrow (or a shards directory)")
+
+
+# Chunks from a file, a data.py shards directory (manifest.json) or, with
+# source=None, freshly generated synthetic rows
+def iter_source(source=None, chunk_size=DEFAULT_CHUNK_SIZE, rows=None, seed=None):
+    if source is None:
+        from data import iter_chunks
+        yield from iter_chunks(rows, chunk_size, seed)
+    elif os.path.isdir(source):
+        from data import read_manifest
+        for part in read_manifest(source):
+            yield from read_file_chunks(part, chunk_size)
+    else:
+        yield from read_file_chunks(source, chunk_size)
+
+
+# Yield chunks from a background thread, so reading the next chunk overlaps scoring this one
+def prefetch(chunks):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        iterator = iter(chunks)
+        future = executor.submit(next, iterator, None)
+        while True:
+            chunk = future.result()
+            if chunk is None:
+                return
+            future = executor.submit(next, iterator, None)
+            yield chunk
+
+
+# Model inputs for one chunk: raw sensor readings go through the same index
+# code as the dashboard, recorded datasets use their feature columns as is
+def chunk_features(chunk, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+    if all(field in chunk for field in SENSOR_FIELDS):
+        columns = {field: chunk[field].to_numpy(dtype=float) for field in SENSOR_FIELDS}
+        return feature_matrix(features_from_columns(columns, wind_speed, previous_dmc, previous_dc)), "readings"
+    missing = [name for name in FEATURE_COLUMNS if name not in chunk]
+    if missing:
+        raise ValueError(f"chunk has neither sensor fields nor feature columns (missing {', '.join(missing)})")
+    return chunk[FEATURE_COLUMNS].to_numpy(dtype=float), "features"
+
+
+# Run every chunk through the ensemble and the alert decision and accumulate
+# accuracy (where a Risk column exists), agreement and alert counts
+def replay(chunks, ensemble, models=ENSEMBLE_ORDER):
+    n_labels = len(RISK_LABELS)
+    rows = labelled = 0
+    correct = dict.fromkeys(list(models) + ["vote"], 0)
+    matches_vote = dict.fromkeys(models, 0)
+    unanimous = 0
+    vote_count_sum = 0
+    vote_counts = np.zeros(n_labels, dtype=np.int64)
+    confusion = np.zeros((n_labels, n_labels), dtype=np.int64)
+    alerts = {"risk": 0, "sms": 0}
+    sms_rows = 0
+    modes = set()
+    score_seconds = 0.0
+
+    start = time.perf_counter()
+    for chunk in prefetch(chunks):
+        X, mode = chunk_features(chunk)
+        modes.add(mode)
+        score_start = time.perf_counter()
+        result = ensemble.predict_batch(X)
+        score_seconds += time.perf_counter() - score_start
+        vote = result["vote_codes"]
+        n = len(vote)
+        rows += n
+        vote_counts += np.bincount(vote, minlength=n_labels)
+        vote_count_sum += int(result["vote_count"].sum())
+        unanimous += int((result["vote_count"] == len(models)).sum())
+        for name in models:
+            matches_vote[name] += int((result["codes"][name] == vote).sum())
+
+        mq5 = chunk["mq5"].to_numpy(dtype=float) if "mq5" in chunk else np.zeros(n)
+        flags = alert_flags(result["vote"], mq5)
+        alerts["risk"] += int(flags["risk"].sum())
+        if "mq5" in chunk:
+            sms_rows += n
+            alerts["sms"] += int(flags["sms"].sum())
+
+        if "Risk" in chunk:
+            truth = chunk["Risk"].astype(str).map(RISK_MAP).to_numpy()
+            known = ~np.isnan(truth.astype(float))
+            truth = truth[known].astype(np.int64)
+            labelled += len(truth)
+            for name in models:
+                correct[name] += int((result["codes"][name][known] == truth).sum())
+            correct["vote"] += int((vote[known] == truth).sum())
+            np.add.at(confusion, (truth, vote[known]), 1)
+    seconds = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "mode": "+".join(sorted(modes)),
+        "seconds": seconds,
+        "score_seconds": score_seconds,
+        "rows_per_second": rows / seconds if seconds else 0.0,
+        "accuracy": {name: count / labelled for name, count in correct.items()} if labelled else None,
+        "confusion": confusion.tolist() if labelled else None,
+        "agreement": {
+            "unanimous": unanimous / rows if rows else 0.0,
+            "mean_vote_count": vote_count_sum / rows if rows else 0.0,
+            "with_vote": {name: count / rows for name, count in matches_vote.items()} if rows else {},
+        },
+        "votes": dict(zip(RISK_LABELS.tolist(), vote_counts.tolist())),
+        "alerts": {"risk": alerts["risk"], "sms": alerts["sms"] if sms_rows else None},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded or synthetic data through the scoring pipeline")
+    parser.add_argument("source", nargs="?", default="Dataset.csv",
+                        help="CSV/XLSX/Parquet/Arrow file or shards directory (ignored with --synthetic)")
+    parser.add_argument("--synthetic", type=int, default=None, metavar="ROWS", help="replay freshly generated rows instead")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--artifact", default=None,
+                        help="score with a compiled model artifact instead of the pickles (several times slower: "
+                             "about 6k vs 28k rows/s on one CPU, so multi-million-row replays take 10+ minutes)")
+    args = parser.parse_args()
+
+    import warnings
+    warnings.filterwarnings("ignore")
+    ensemble = load_ensemble(args.artifact)
+    # Load every model before the clock starts
+    ensemble.predict_batch(np.zeros((1, len(FEATURE_COLUMNS))))
+    source = None if args.synthetic else args.source
+    report = replay(iter_source(source, args.chunk_size, args.synthetic, args.seed), ensemble)
+
+    print(f"{report['rows']} rows ({report['mode']}) in {report['seconds']:.1f} s: {report['rows_per_second']:.0f} rows/s "
+          f"({report['score_seconds']:.1f} s scoring)")
+    if report["accuracy"]:
+        print("accuracy: " + ", ".join(f"{name} {value:.2%}" for name, value in report["accuracy"].items()))
+    agreement = report["agreement"]
+    print(f"agreement: unanimous {agreement['unanimous']:.2%}, mean votes for winner {agreement['mean_vote_count']:.2f}, "
+          + ", ".join(f"{name} {value:.2%}" for name, value in agreement["with_vote"].items()))
+    print("votes: " + ", ".join(f"{label} {count}" for label, count in report["votes"].items()))
+    sms = report["alerts"]["sms"]
+    print(f"alerts: {report['alerts']['risk']} High/Extreme, {'n/a (no mq5 column)' if sms is None else sms} SMS")
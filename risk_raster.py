@@ -0,0 +1,310 @@
+import argparse
+import io
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from fire_indices import DEFAULT_PREVIOUS_DC, DEFAULT_PREVIOUS_DMC, DEFAULT_WIND_SPEED, SENSOR_FIELDS, feature_matrix, features_from_columns
+from inference import RISK_LABELS
+
+EARTH_RADIUS = 6_371_000.0
+DEFAULT_NEIGHBORS = 8
+DEFAULT_POWER = 2.0
+DEFAULT_TILE_SIZE = 256
+NODATA = 255
+
+# Station values interpolated onto the grid: the raw readings plus the DMC/DC carry-over
+FIELDS = SENSOR_FIELDS + ["previous_dmc", "previous_dc"]
+FIELD_DEFAULTS = {"previous_dmc": DEFAULT_PREVIOUS_DMC, "previous_dc": DEFAULT_PREVIOUS_DC}
+# Float bands written per tile next to the uint8 risk and vote_count bands
+INDEX_BANDS = ["FFMC", "DMC", "DC", "ISI", "BUI", "FWI"]
+
+
+# Equirectangular projection to metres around latitude lat0, accurate enough
+# for nearest-neighbour search over a forest-sized area
+def project(lat, lon, lat0):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack([EARTH_RADIUS * lon * math.cos(math.radians(lat0)), EARTH_RADIUS * lat])
+
+
+# Regular lat/lon raster, north-up, row-major cells; geotransform uses the GDAL layout
+class RasterGrid:
+    def __init__(self, lat_min, lat_max, lon_min, lon_max, resolution):
+        if lat_max <= lat_min or lon_max <= lon_min or resolution <= 0:
+            raise ValueError("grid needs lat_min < lat_max, lon_min < lon_max and a positive resolution")
+        self.lat_min, self.lat_max = lat_min, lat_max
+        self.lon_min, self.lon_max = lon_min, lon_max
+        self.resolution = resolution
+        self.rows = math.ceil(round((lat_max - lat_min) / resolution, 9))
+        self.cols = math.ceil(round((lon_max - lon_min) / resolution, 9))
+
+    @property
+    def shape(self):
+        return self.rows, self.cols
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    @property
+    def geotransform(self):
+        return [self.lon_min, self.resolution, 0.0, self.lat_max, 0.0, -self.resolution]
+
+    # Latitude and longitude of every cell centre, flattened row-major
+    def cell_coordinates(self):
+        lat = self.lat_max - (np.arange(self.rows) + 0.5) * self.resolution
+        lon = self.lon_min + (np.arange(self.cols) + 0.5) * self.resolution
+        return np.repeat(lat, self.cols), np.tile(lon, self.rows)
+
+    # (tile_row, tile_col, row slice, col slice) covering the grid
+    def tiles(self, tile_size=DEFAULT_TILE_SIZE):
+        for tile_row, r0 in enumerate(range(0, self.rows, tile_size)):
+            for tile_col, c0 in enumerate(range(0, self.cols, tile_size)):
+                yield tile_row, tile_col, slice(r0, min(r0 + tile_size, self.rows)), slice(c0, min(c0 + tile_size, self.cols))
+
+    def meta(self):
+        return {"bounds": [self.lat_min, self.lat_max, self.lon_min, self.lon_max], "resolution": self.resolution}
+
+
+# Inverse-distance weights from each cell to its k nearest stations, computed
+# once with a KD-tree. Also keeps the inverse index (station -> cells it
+# contributes to), so a station update only touches the cells that use it.
+class IDWInterpolator:
+    def __init__(self, station_lat, station_lon, grid, k=DEFAULT_NEIGHBORS, power=DEFAULT_POWER, max_distance=None):
+        from scipy.spatial import cKDTree
+
+        station_lat, station_lon = np.asarray(station_lat, dtype=float), np.asarray(station_lon, dtype=float)
+        if len(station_lat) == 0:
+            raise ValueError("need at least one station")
+        lat0 = (grid.lat_min + grid.lat_max) / 2
+        cell_lat, cell_lon = grid.cell_coordinates()
+        self.n_stations = len(station_lat)
+        self.k = min(k, self.n_stations)
+        distance, index = cKDTree(project(station_lat, station_lon, lat0)).query(project(cell_lat, cell_lon, lat0), k=self.k)
+        distance, index = distance.reshape(-1, self.k), index.reshape(-1, self.k)
+
+        # A cell on top of a station gets a weight large enough to reproduce its value
+        weights = 1.0 / np.maximum(distance, 1e-6) ** power
+        if max_distance is not None:
+            weights[distance > max_distance] = 0.0
+        total = weights.sum(axis=1, keepdims=True)
+        self.covered = total[:, 0] > 0
+        self.weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0).astype(np.float32)
+        self.index = index.astype(np.int32)
+
+        flat = self.index.ravel()
+        self._order = np.argsort(flat, kind="stable")
+        self._starts = np.searchsorted(flat[self._order], np.arange(self.n_stations + 1))
+
+    # Cells whose value depends on any of the given station indices
+    def cells_for(self, stations):
+        parts = [self._order[self._starts[s]:self._starts[s + 1]] for s in stations]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts) // self.k)
+
+    # (cells, fields) interpolated values for the given cells (all by default).
+    # Stations without a value for a field (NaN) are left out and the remaining
+    # weights renormalized; cells with no usable station come out NaN.
+    def interpolate(self, values, cells=None):
+        values = np.asarray(values, dtype=float).reshape(self.n_stations, -1)
+        weights, index = (self.weights, self.index) if cells is None else (self.weights[cells], self.index[cells])
+        neighbours = values[index]
+        known = ~np.isnan(neighbours)
+        weights = weights[:, :, None] * known
+        total = weights.sum(axis=1)
+        weighted = np.einsum("ckf,ckf->cf", weights, np.where(known, neighbours, 0.0))
+        return np.divide(weighted, total, out=np.full_like(weighted, np.nan), where=total > 0)
+
+
+# Risk over a lat/lon raster: station readings are interpolated onto the grid,
+# indices are computed per cell and the ensemble scores the cells in tile-sized
+# batches. update() rescores only the cells near stations whose values changed.
+class RiskRaster:
+    def __init__(self, grid, stations, ensemble, k=DEFAULT_NEIGHBORS, power=DEFAULT_POWER, max_distance=None,
+                 tile_size=DEFAULT_TILE_SIZE, wind_speed=DEFAULT_WIND_SPEED):
+        self.grid = grid
+        self.stations = list(stations)
+        self.ensemble = ensemble
+        self.tile_size = tile_size
+        self.wind_speed = wind_speed
+        self.interpolator = IDWInterpolator([stations[s][0] for s in self.stations], [stations[s][1] for s in self.stations],
+                                            grid, k, power, max_distance)
+        self._station_index = {station: i for i, station in enumerate(self.stations)}
+        self.values = np.full((len(self.stations), len(FIELDS)), np.nan)
+        self.risk = np.full(grid.size, NODATA, dtype=np.uint8)
+        self.vote_count = np.zeros(grid.size, dtype=np.uint8)
+        self.bands = {name: np.full(grid.size, np.nan, dtype=np.float32) for name in INDEX_BANDS}
+        self.tile_versions = {}
+        self.dirty_tiles = set()
+        self.cells_scored = 0
+
+    def _tile_ids(self, cells):
+        rows, cols = np.divmod(cells, self.grid.cols)
+        tile_cols = math.ceil(self.grid.cols / self.tile_size)
+        return set(np.unique((rows // self.tile_size) * tile_cols + cols // self.tile_size).tolist())
+
+    # Interpolate, compute indices and score `cells` in batches of one tile's worth of cells
+    def _score(self, cells):
+        batch = self.tile_size * self.tile_size
+        for start in range(0, len(cells), batch):
+            chunk = cells[start:start + batch]
+            values = self.interpolator.interpolate(self.values, chunk)
+            valid = self.interpolator.covered[chunk] & ~np.isnan(values).any(axis=1)
+            self.risk[chunk[~valid]] = NODATA
+            self.vote_count[chunk[~valid]] = 0
+            for band in self.bands.values():
+                band[chunk[~valid]] = np.nan
+            chunk, values = chunk[valid], values[valid]
+            if not len(chunk):
+                continue
+            columns = {field: values[:, j] for j, field in enumerate(FIELDS)}
+            features = features_from_columns(columns, self.wind_speed, columns["previous_dmc"], columns["previous_dc"])
+            result = self.ensemble.predict_batch(feature_matrix(features))
+            self.risk[chunk] = result["vote_codes"]
+            self.vote_count[chunk] = result["vote_count"]
+            for name in INDEX_BANDS:
+                self.bands[name][chunk] = features[name]
+        self.cells_scored += len(cells)
+        self.dirty_tiles |= self._tile_ids(cells)
+
+    # Apply {station: reading} (readings may carry previous_dmc/previous_dc) and
+    # rescore the affected cells; returns how many cells were rescored
+    def update(self, readings):
+        changed = []
+        for station, reading in readings.items():
+            i = self._station_index.get(station)
+            if i is None:
+                raise ValueError(f"unknown station {station!r}; rebuild the raster to add stations")
+            row = np.array([float(reading.get(field, FIELD_DEFAULTS.get(field, np.nan))) for field in FIELDS])
+            if not np.array_equal(row, self.values[i], equal_nan=True):
+                self.values[i] = row
+                changed.append(i)
+        if not changed:
+            return 0
+        full = len(changed) == len(self.stations) or not self.cells_scored
+        cells = np.arange(self.grid.size) if full else self.interpolator.cells_for(changed)
+        self._score(cells)
+        return len(cells)
+
+    # Band arrays shaped like the grid
+    def band(self, name):
+        if name == "risk":
+            return self.risk.reshape(self.grid.shape)
+        if name == "vote_count":
+            return self.vote_count.reshape(self.grid.shape)
+        return self.bands[name].reshape(self.grid.shape)
+
+    # Write changed tiles as compressed .npz plus index.json with the geotransform
+    # of the raster and of every tile; returns the number of tiles written
+    def write_tiles(self, out_dir, only_dirty=True):
+        os.makedirs(out_dir, exist_ok=True)
+        tile_cols = math.ceil(self.grid.cols / self.tile_size)
+        res = self.grid.resolution
+        tiles, written = [], 0
+        for tile_row, tile_col, rows, cols in self.grid.tiles(self.tile_size):
+            tile_id = tile_row * tile_cols + tile_col
+            name = f"tile_{tile_row:03d}_{tile_col:03d}.npz"
+            if tile_id in self.dirty_tiles or not only_dirty or not os.path.exists(os.path.join(out_dir, name)):
+                arrays = {"risk": self.band("risk")[rows, cols], "vote_count": self.band("vote_count")[rows, cols]}
+                arrays.update({band: self.band(band)[rows, cols] for band in INDEX_BANDS})
+                buffer = io.BytesIO()
+                np.savez_compressed(buffer, **arrays)
+                with open(os.path.join(out_dir, name + ".tmp"), "wb") as f:
+                    f.write(buffer.getvalue())
+                os.replace(os.path.join(out_dir, name + ".tmp"), os.path.join(out_dir, name))
+                self.tile_versions[tile_id] = self.tile_versions.get(tile_id, 0) + 1
+                written += 1
+            tiles.append({
+                "row": tile_row,
+                "col": tile_col,
+                "file": name,
+                "shape": [rows.stop - rows.start, cols.stop - cols.start],
+                "geotransform": [self.grid.lon_min + cols.start * res, res, 0.0, self.grid.lat_max - rows.start * res, 0.0, -res],
+                "version": self.tile_versions.get(tile_id, 0),
+            })
+        index = {
+            "crs": "EPSG:4326",
+            "shape": list(self.grid.shape),
+            "geotransform": self.grid.geotransform,
+            "tile_size": self.tile_size,
+            "bands": ["risk", "vote_count"] + INDEX_BANDS,
+            "labels": RISK_LABELS.tolist(),
+            "nodata": NODATA,
+            "stations": len(self.stations),
+            "updated": time.time(),
+            "tiles": tiles,
+        }
+        with open(os.path.join(out_dir, "index.json.tmp"), "w") as f:
+            json.dump(index, f, indent=2)
+        os.replace(os.path.join(out_dir, "index.json.tmp"), os.path.join(out_dir, "index.json"))
+        self.dirty_tiles.clear()
+        return written
+
+
+# Random stations and readings inside the grid, for trying the raster offline
+def mock_stations(grid, n, seed=None):
+    from benchmarks import sensor_columns
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(grid.lat_min, grid.lat_max, n)
+    lon = rng.uniform(grid.lon_min, grid.lon_max, n)
+    columns = sensor_columns(n, rng)
+    names = [f"station-{i:04d}" for i in range(n)]
+    stations = {name: (lat[i], lon[i]) for i, name in enumerate(names)}
+    readings = {name: {field: float(values[i]) for field, values in columns.items()} for i, name in enumerate(names)}
+    return stations, readings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interpolate station readings onto a risk raster and write map tiles")
+    parser.add_argument("--stations", default=None,
+                        help="JSON {station: {lat, lon, tempBMP, humidity, ...}} (default: random mock stations)")
+    parser.add_argument("--mock", type=int, default=50, help="number of mock stations when --stations is not given")
+    parser.add_argument("--bounds", type=float, nargs=4, default=[18.9, 19.3, 72.8, 73.2],
+                        metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"))
+    parser.add_argument("--resolution", type=float, default=0.001, help="cell size in degrees")
+    parser.add_argument("--neighbors", type=int, default=DEFAULT_NEIGHBORS)
+    parser.add_argument("--power", type=float, default=DEFAULT_POWER)
+    parser.add_argument("--max-distance", type=float, default=None, help="metres beyond which a station is ignored")
+    parser.add_argument("--tile-size", type=int, default=DEFAULT_TILE_SIZE)
+    parser.add_argument("--artifact", default=None,
+                        help="score with a compiled model artifact instead of the .pkl models (slower, see compiled_trees.py)")
+    parser.add_argument("--out-dir", default="risk_tiles")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from scoring_service import load_ensemble
+
+    grid = RasterGrid(*args.bounds, args.resolution)
+    if args.stations:
+        with open(args.stations) as f:
+            data = json.load(f)
+        stations = {name: (entry["lat"], entry["lon"]) for name, entry in data.items()}
+        readings = data
+    else:
+        stations, readings = mock_stations(grid, args.mock, args.seed)
+    ensemble = load_ensemble(args.artifact)
+
+    start = time.perf_counter()
+    raster = RiskRaster(grid, stations, ensemble, args.neighbors, args.power, args.max_distance, args.tile_size)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    cells = raster.update(readings)
+    score_seconds = time.perf_counter() - start
+    written = raster.write_tiles(args.out_dir)
+    print(f"{grid.rows}x{grid.cols} grid, {len(stations)} stations: neighbour index {build_seconds:.2f} s, "
+          f"{cells} cells scored in {score_seconds:.2f} s, {written} tiles written to {args.out_dir}")
+    counts = np.bincount(raster.risk[raster.risk != NODATA], minlength=len(RISK_LABELS))
+    print("cells: " + ", ".join(f"{label} {count}" for label, count in zip(RISK_LABELS, counts)))
+
+    if not args.stations:
+        # Incremental update: two stations report new values
+        changed = dict(list(mock_stations(grid, 2, args.seed + 1)[1].items()))
+        start = time.perf_counter()
+        cells = raster.update(changed)
+        written = raster.write_tiles(args.out_dir)
+        print(f"update of {len(changed)} stations: {cells} cells rescored in {time.perf_counter() - start:.2f} s, "
+              f"{written} tiles rewritten")
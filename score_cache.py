@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from fire_indices import DEFAULT_PREVIOUS_DC, DEFAULT_PREVIOUS_DMC, DEFAULT_WIND_SPEED, FEATURE_COLUMNS, INDEX_COLUMNS, feature_matrix, features_from_columns
+from inference import ENSEMBLE_ORDER, RISK_LABELS, majority_vote, predict_batch
+from metrics import timer
+
+# Sensor precision used to quantize readings into cache keys. Only the fields
+# the indices and models read are part of the key (mq5 is display only).
+DEFAULT_STEPS = {"tempBMP": 0.01, "humidity": 0.1, "pressure": 0.01, "soil": 1, "mq7": 1}
+# Carry-over and wind are part of the key too, at the precision they are stored with
+CONTEXT_STEPS = {"wind_speed": 0.01, "previous_dmc": 0.01, "previous_dc": 0.01}
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL = 300.0
+
+
+# LRU + TTL cache in front of the indices + five-model pipeline.
+# Readings are snapped to their quantization step before scoring, so every
+# reading that maps to a key gets exactly the result stored under it.
+class ScoreCache:
+    def __init__(self, predict_fn=None, steps=None, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, models=ENSEMBLE_ORDER):
+        self.predict_fn = predict_fn or predict_batch
+        self.steps = {**DEFAULT_STEPS, **(steps or {})}
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.models = list(models)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _quantize(self, readings, wind_speed, previous_dmc, previous_dc):
+        n = len(readings)
+        quantized = {field: np.round(np.array([float(reading[field]) for reading in readings]) / step).astype(np.int64)
+                     for field, step in self.steps.items()}
+        context = {"wind_speed": wind_speed, "previous_dmc": previous_dmc, "previous_dc": previous_dc}
+        for name, step in CONTEXT_STEPS.items():
+            quantized[name] = np.round(np.broadcast_to(np.asarray(context[name], dtype=float), (n,)) / step).astype(np.int64)
+        return quantized
+
+    # Keys and snapped values for a batch of readings
+    def keys(self, readings, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+        quantized = self._quantize(readings, wind_speed, previous_dmc, previous_dc)
+        names = list(self.steps) + list(CONTEXT_STEPS)
+        keys = list(zip(*(quantized[name].tolist() for name in names)))
+        steps = {**self.steps, **CONTEXT_STEPS}
+        return keys, {name: np.round(quantized[name] * steps[name], 10) for name in names}
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key, value, now):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # Features and predictions for N readings, shaped like predict_batch plus a
+    # "features" dict. Only readings missing from the cache are scored, in one batch.
+    def score(self, readings, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+        keys, snapped = self.keys(readings, wind_speed, previous_dmc, previous_dc)
+        n = len(keys)
+        rows = np.empty((n, len(FEATURE_COLUMNS)))
+        codes = np.empty((len(self.models), n), dtype=np.int64)
+        now = time.monotonic()
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._get(key, now)
+                if value is None:
+                    missing.append(i)
+                else:
+                    rows[i], codes[:, i] = value
+            self.hits += n - len(missing)
+            self.misses += len(missing)
+        if missing:
+            index = np.array(missing)
+            columns = {field: snapped[field][index] for field in self.steps}
+            with timer("indices"):
+                features = features_from_columns(columns, snapped["wind_speed"][index], snapped["previous_dmc"][index],
+                                                 snapped["previous_dc"][index])
+                X = feature_matrix(features)
+            result = self.predict_fn(X)
+            rows[index] = X
+            codes[:, index] = np.stack([result["codes"][name] for name in self.models])
+            with self._lock:
+                for i in missing:
+                    self._put(keys[i], (rows[i].copy(), codes[:, i].copy()), now)
+        vote_codes, vote_count = majority_vote(codes)
+        return {
+            "features": {name: rows[:, j] for j, name in enumerate(FEATURE_COLUMNS)},
+            "codes": {name: codes[m] for m, name in enumerate(self.models)},
+            "labels": {name: RISK_LABELS[codes[m]] for m, name in enumerate(self.models)},
+            "vote_codes": vote_codes,
+            "vote": RISK_LABELS[vote_codes],
+            "vote_count": vote_count,
+        }
+
+    # One station's reading: its indices as Python floats, plus the score() result
+    def score_one(self, reading, wind_speed=DEFAULT_WIND_SPEED, previous_dmc=DEFAULT_PREVIOUS_DMC, previous_dc=DEFAULT_PREVIOUS_DC):
+        result = self.score([reading], wind_speed, previous_dmc, previous_dc)
+        return {name: result["features"][name].item() for name in INDEX_COLUMNS}, result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import json
+import math
+import time
+
+from fire_indices import INDEX_COLUMNS, SENSOR_FIELDS, feature_matrix, features_from_columns, readings_to_columns
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT = 0.005
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+               500: "Internal Server Error"}
+
+
+# Ensemble used by the service: the memory-mapped artifact if given, else the pickles.
+# An artifact built from pickles that have since been retrained is refused,
+# or rebuilt from the current pickles with rebuild=True.
+def load_ensemble(artifact=None, rebuild=False):
+    if artifact:
+        from model_artifact import convert_pickles, load_artifact, read_header, stale_sources
+        stale = stale_sources(read_header(artifact))
+        if stale:
+            if not rebuild:
+                raise ValueError(f"{artifact} is stale ({', '.join(stale)} retrained since it was built); "
+                                 f"run python model_artifact.py convert --output {artifact}")
+            convert_pickles(artifact)
+        return load_artifact(artifact)
+
+    from inference import predict_batch
+    from model_registry import default_registry
+
+    class _RegistryEnsemble:
+        def __init__(self, registry):
+            self.registry = registry
+
+        def predict_batch(self, X):
+            return predict_batch(X, self.registry)
+
+    return _RegistryEnsemble(default_registry())
+
+
+# Indices plus the five-model vote for a list of raw readings
+def score_readings(ensemble, readings):
+    features = features_from_columns(readings_to_columns(readings))
+    result = ensemble.predict_batch(feature_matrix(features))
+    scores = []
+    for i, reading in enumerate(readings):
+        scores.append({
+            "station": reading.get("station"),
+            "indices": {name: float(features[name][i]) for name in INDEX_COLUMNS},
+            "predictions": {name: str(labels[i]) for name, labels in result["labels"].items()},
+            "vote": str(result["vote"][i]),
+            "vote_count": int(result["vote_count"][i]),
+        })
+    return scores
+
+
+# Check a reading has every sensor field as a finite number
+def validate_reading(reading):
+    if not isinstance(reading, dict):
+        raise ValueError("each reading must be a JSON object")
+    missing = [field for field in SENSOR_FIELDS if field not in reading]
+    if missing:
+        raise ValueError(f"reading is missing {', '.join(missing)}")
+    for field in SENSOR_FIELDS:
+        if isinstance(reading[field], bool) or not isinstance(reading[field], (int, float)) or not math.isfinite(reading[field]):
+            raise ValueError(f"{field} must be a finite number")
+    return reading
+
+
+# Collects concurrent submissions into batches of up to max_batch_size,
+# waiting at most max_wait seconds after the first reading of a batch
+class MicroBatcher:
+    def __init__(self, score_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, reading):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((reading, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            readings = [reading for reading, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self.score_fn, readings)
+            except Exception:
+                # Score one by one so a bad reading fails only its own caller
+                results = [await self._score_one(loop, reading) for reading in readings]
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.batches += 1
+            self.items += len(batch)
+
+    async def _score_one(self, loop, reading):
+        try:
+            return (await loop.run_in_executor(None, self.score_fn, [reading]))[0]
+        except Exception as e:
+            return e
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "readings": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait": self.max_wait,
+        }
+
+
+# Minimal HTTP/1.1 front end (keep-alive, JSON bodies) on asyncio streams
+#   POST /score   {"tempBMP": ..., ...} or {"readings": [{...}, ...]}
+#   GET  /health
+#   GET  /stats
+class ScoringService:
+    def __init__(self, ensemble, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT):
+        self.batcher = MicroBatcher(lambda readings: score_readings(ensemble, readings), max_batch_size, max_wait)
+        self.requests = 0
+        self.started = time.time()
+
+    async def serve(self, host="127.0.0.1", port=8080):
+        self.batcher.start()
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Scoring service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, _ = parts
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line or Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        self.requests += 1
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, {"requests": self.requests, "uptime": time.time() - self.started, **self.batcher.stats()}
+        if path != "/score":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            payload = json.loads(body or b"null")
+            many = isinstance(payload, dict) and "readings" in payload
+            if many and not isinstance(payload["readings"], list):
+                raise ValueError("readings must be a list of JSON objects")
+            readings = [validate_reading(reading) for reading in (payload["readings"] if many else [payload])]
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        try:
+            results = await asyncio.gather(*(self.batcher.submit(reading) for reading in readings))
+        except Exception as e:
+            return 500, {"error": str(e)}
+        return 200, {"results": results} if many else results[0]
+
+    async def _respond(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless fire risk scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--artifact", default=None,
+                        help="memory-mapped model artifact (see model_artifact.py): fast start-up and shared memory, "
+                             "but slower scoring than the default .pkl models")
+    parser.add_argument("--rebuild-stale", action="store_true",
+                        help="rebuild the artifact from the .pkl models if they changed since it was built")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000)
+    args = parser.parse_args()
+
+    ensemble = load_ensemble(args.artifact, args.rebuild_stale)
+    # Warm up so the first request does not pay for model loading
+    score_readings(ensemble, [{field: 0.0 for field in SENSOR_FIELDS}])
+    service = ScoringService(ensemble, args.max_batch_size, args.max_wait_ms / 1000)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,169 @@
+import atexit
+import copy
+import datetime
+import json
+import os
+import threading
+
+from fire_indices import DEFAULT_PREVIOUS_DC, DEFAULT_PREVIOUS_DMC
+from metrics import timer
+
+DEFAULT_STATE_PATH = "fire_index_state.json"
+DEFAULT_FLUSH_INTERVAL = 60.0
+
+
+def _today():
+    return datetime.date.today().isoformat()
+
+
+# Backend writer for IndexStateStore: one multi-path update per flush under `path`.
+# Each station gets its latest values (previous_*), the day's starting
+# carry-over (start_*) and the date they belong to.
+# flat_station keeps the original single-node layout (/fire_indices/previous_dmc)
+# for that station, as dashboard.py and new.py read it.
+def firebase_writer(path="/fire_indices", flat_station=None):
+    def write(updates):
+        from firebase_admin import db
+        payload = {}
+        for station, fields in updates.items():
+            for name, value in fields.items():
+                payload[name if station == flat_station else f"{station}/{name}"] = value
+        db.reference(path).update(payload)
+    return write
+
+
+# DMC/DC/FFMC carry-over per station.
+# The codes are daily: readings during a day all start from the previous day's
+# final values, and the last values of a day become the next day's carry-over.
+# Changes are kept in memory, saved to a local JSON file and pushed to the
+# backend writer in one batch every flush_interval seconds.
+class IndexStateStore:
+    def __init__(self, path=DEFAULT_STATE_PATH, writer=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.flushes = 0
+        self.failed_flushes = 0
+        self._states = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._load()
+
+    def __contains__(self, station):
+        with self._lock:
+            return station in self._states
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                self._states = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read index state from {self.path}: {e}")
+
+    def _save(self, states):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(states, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # Seed a station from values written by an earlier run (e.g. /fire_indices).
+    # Values written on `day` restore that day's starting carry-over (start_*),
+    # so a restart does not count the day twice; values from an earlier day, or
+    # without a date, are that day's final values.
+    # A station seeded with the defaults (no stored values yet) is re-seeded
+    # when real values arrive later, as long as it has not been updated since.
+    def seed(self, station, data, day=None):
+        day = day or _today()
+        data = data or {}
+        stored = "previous_dmc" in data or "previous_dc" in data
+        with self._lock:
+            state = self._states.get(station)
+            if state is not None and not (state.get("source") == "default" and stored):
+                return
+            state = {
+                "date": None,
+                "dmc": data.get("previous_dmc", DEFAULT_PREVIOUS_DMC),
+                "dc": data.get("previous_dc", DEFAULT_PREVIOUS_DC),
+                "ffmc": data.get("previous_ffmc"),
+                "source": "stored" if stored else "default",
+            }
+            if data.get("date") == day and "start_dmc" in data and "start_dc" in data:
+                state.update({"date": day, "previous_dmc": data["start_dmc"], "previous_dc": data["start_dc"],
+                              "previous_ffmc": data.get("start_ffmc")})
+            self._states[station] = state
+
+    # Carry-over values to start `day` from
+    def previous(self, station, day=None):
+        day = day or _today()
+        with self._lock:
+            state = self._states.get(station)
+            if state is None:
+                return {"dmc": DEFAULT_PREVIOUS_DMC, "dc": DEFAULT_PREVIOUS_DC, "ffmc": None}
+            if state["date"] == day:
+                return {"dmc": state["previous_dmc"], "dc": state["previous_dc"], "ffmc": state["previous_ffmc"]}
+            return {"dmc": state["dmc"], "dc": state["dc"], "ffmc": state["ffmc"]}
+
+    # Record the latest values for `day`; only real changes are queued for writing
+    def update(self, station, ffmc, dmc, dc, day=None):
+        day = day or _today()
+        with self._lock:
+            state = self._states.get(station)
+            if state is None or state["date"] != day:
+                carry = {"dmc": DEFAULT_PREVIOUS_DMC, "dc": DEFAULT_PREVIOUS_DC, "ffmc": None} if state is None else state
+                state = {"date": day, "previous_dmc": carry["dmc"], "previous_dc": carry["dc"], "previous_ffmc": carry["ffmc"]}
+            new = {**state, "ffmc": ffmc, "dmc": dmc, "dc": dc}
+            if new != self._states.get(station):
+                self._states[station] = new
+                self._dirty.add(station)
+
+    # Save locally and push every changed station to the writer in one call.
+    # Stations stay dirty until both succeed, so a failed flush is retried.
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty = set(self._dirty)
+            states = copy.deepcopy(self._states)
+        try:
+            self._save(states)
+            if self.writer is not None:
+                updates = {
+                    station: {"date": states[station]["date"], "previous_dmc": states[station]["dmc"],
+                              "previous_dc": states[station]["dc"], "previous_ffmc": states[station]["ffmc"],
+                              "start_dmc": states[station]["previous_dmc"], "start_dc": states[station]["previous_dc"],
+                              "start_ffmc": states[station]["previous_ffmc"]}
+                    for station in dirty
+                }
+                with timer("state_write"):
+                    self.writer(updates)
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"Failed to flush index state: {e}")
+            return 0
+        with self._lock:
+            # Keep stations that changed again while this flush was running
+            self._dirty -= {station for station in dirty if self._states.get(station) == states[station]}
+        self.flushes += 1
+        return len(dirty)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Index state flush loop error: {e}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        return self
+
+    def close(self):
+        self._stop.set()
+        self.flush()
@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import inspect
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from fire_indices import SENSOR_FIELDS, feature_matrix, features_from_columns
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_TIMEOUT = 2.0
+
+
+# Blocking reads through firebase_admin, which keeps one HTTP session per app,
+# so every worker thread reuses the same pooled connections
+class FirebaseReadBackend:
+    def get(self, path):
+        from firebase_admin import db
+        return db.reference(path).get()
+
+
+# Offline backend with configurable latency and failures, for benchmarks and tests
+class MockReadBackend:
+    def __init__(self, latency=0.02, jitter=0.01, failure_rate=0.0, hang_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.random = random.Random(seed)
+
+    async def get(self, path):
+        roll = self.random.random()
+        if roll < self.hang_rate:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        if roll < self.hang_rate + self.failure_rate:
+            raise ConnectionError(f"mock failure reading {path}")
+        return {
+            "tempBMP": round(self.random.uniform(10, 50), 2),
+            "humidity": round(self.random.uniform(10, 90), 2),
+            "pressure": round(self.random.uniform(900, 1020), 2),
+            "soil": round(self.random.uniform(0, 1000), 2),
+            "mq7": round(self.random.uniform(0, 1000), 2),
+            "mq5": round(self.random.uniform(0, 800), 2),
+        }
+
+
+# Readings for the stations that answered, as one float array per sensor field,
+# plus the error message for every station path that did not
+class StationBatch:
+    def __init__(self, stations, columns, errors, paths=None):
+        self.stations = stations
+        self.paths = paths if paths is not None else list(stations)
+        self.columns = columns
+        self.errors = errors
+
+    def __len__(self):
+        return len(self.stations)
+
+    def features(self, **kwargs):
+        return features_from_columns(self.columns, **kwargs)
+
+    def matrix(self, **kwargs):
+        return feature_matrix(self.features(**kwargs))
+
+
+# Reads many station paths concurrently with bounded concurrency and a timeout
+# per station. Stations are keyed by a caller-supplied id, or by their full
+# path, so stations at different paths never share a key. Failed or malformed
+# stations are reported, not raised, keyed by their full path.
+# Synchronous backends run in a thread pool of `concurrency` threads. A timed
+# out read cannot be interrupted there: its thread stays busy until the
+# backend call returns, so hung calls reduce the effective concurrency of
+# later reads on the same reader.
+class StationReader:
+    def __init__(self, backend, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+        self.backend = backend
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self._async_get = inspect.iscoroutinefunction(backend.get)
+        self._executor = None if self._async_get else ThreadPoolExecutor(max_workers=concurrency)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _get(self, path):
+        if self._async_get:
+            return await self.backend.get(path)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.backend.get, path)
+
+    async def _read_one(self, semaphore, path):
+        async with semaphore:
+            try:
+                reading = await asyncio.wait_for(self._get(path), self.timeout)
+            except asyncio.TimeoutError:
+                return path, None, f"timed out after {self.timeout} s"
+            except Exception as e:
+                return path, None, f"{type(e).__name__}: {e}"
+        if not isinstance(reading, dict):
+            return path, None, "no data"
+        missing = [field for field in SENSOR_FIELDS if field not in reading]
+        if missing:
+            return path, None, f"missing {', '.join(missing)}"
+        try:
+            return path, [float(reading[field]) for field in SENSOR_FIELDS], None
+        except (TypeError, ValueError):
+            return path, None, "non-numeric sensor value"
+
+    # `paths` is a list of station paths or a dict of station id -> path
+    async def read(self, paths):
+        ids = dict(paths) if isinstance(paths, dict) else {path: path for path in paths}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._read_one(semaphore, path) for path in ids.values()))
+        stations, ok_paths, rows, errors = [], [], [], {}
+        for station, (path, values, error) in zip(ids, results):
+            if error is None:
+                stations.append(station)
+                ok_paths.append(path)
+                rows.append(values)
+            else:
+                errors[path] = error
+        values = np.array(rows, dtype=float).reshape(len(rows), len(SENSOR_FIELDS))
+        columns = {field: values[:, i] for i, field in enumerate(SENSOR_FIELDS)}
+        return StationBatch(stations, columns, errors, ok_paths)
+
+    def read_sync(self, paths):
+        return asyncio.run(self.read(paths))
+
+
+# Stations per second against the mock backend
+def benchmark(n_stations=500, concurrency=DEFAULT_CONCURRENCY, latency=0.02, failure_rate=0.01, timeout=DEFAULT_TIMEOUT):
+    reader = StationReader(MockReadBackend(latency, latency / 2, failure_rate, seed=0), concurrency, timeout)
+    paths = [f"/stations/station-{i:04d}" for i in range(n_stations)]
+    start = time.perf_counter()
+    batch = reader.read_sync(paths)
+    read_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    batch.matrix()
+    feature_seconds = time.perf_counter() - start
+    return {
+        "stations": n_stations,
+        "ok": len(batch),
+        "failed": len(batch.errors),
+        "read_seconds": read_seconds,
+        "stations_per_second": n_stations / read_seconds,
+        "feature_seconds": feature_seconds,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the concurrent station reader against the mock backend")
+    parser.add_argument("--stations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    for concurrency in args.concurrency:
+        report = benchmark(args.stations, concurrency, args.latency_ms / 1000, args.failure_rate)
+        print(f"concurrency {concurrency:4d}: {report['stations_per_second']:8.0f} stations/s  "
+              f"({report['ok']} ok, {report['failed']} failed, features {report['feature_seconds'] * 1000:.1f} ms)")
@@ -0,0 +1,49 @@
+from alerts import AlertDispatcher, FakeTransport, TokenBucket
+
+
+def dispatcher(transport, recipients=("+1",), **options):
+    options = {"rate": 1000, "burst": 10, "backoff": 0.001, "max_retries": 1, **options}
+    return AlertDispatcher(transport, list(recipients), **options).start()
+
+
+def test_duplicates_within_the_window_are_dropped():
+    transport = FakeTransport()
+    alerts = dispatcher(transport)
+    assert alerts.submit("s1", "gas", "fire")
+    alerts.join()
+    assert not alerts.submit("s1", "gas", "fire")
+    assert alerts.submit("s1", "risk", "fire")
+    assert alerts.submit("s2", "gas", "fire")
+    alerts.join()
+    assert len(transport.sent) == 3
+    assert alerts.stats()["deduplicated"] == 1
+
+
+def test_failed_alert_does_not_suppress_the_next_one():
+    transport = FakeTransport(failures=4)
+    alerts = dispatcher(transport, recipients=("+1", "+2"))
+    assert alerts.submit("s1", "gas", "fire")
+    alerts.join()
+    assert alerts.stats()["failed"] == 2
+    assert alerts.submit("s1", "gas", "fire")
+    alerts.join()
+    assert len(transport.sent) == 2
+    assert not alerts.submit("s1", "gas", "fire")
+
+
+def test_retries_until_the_transport_recovers():
+    transport = FakeTransport(failures=1)
+    alerts = dispatcher(transport)
+    alerts.submit("s1", "gas", "fire")
+    alerts.join()
+    stats = alerts.stats()
+    assert (stats["sent"], stats["retries"], stats["failed"]) == (1, 1, 0)
+
+
+def test_token_bucket_waits_once_the_burst_is_spent():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0])
+    assert bucket.take() == 0 and bucket.take() == 0
+    assert bucket.take() == 0.5
+    now[0] = 0.5
+    assert bucket.take() == 0
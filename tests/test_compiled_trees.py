@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from compiled_trees import compile_registry
+from fire_indices import SENSOR_FIELDS, feature_matrix, features_from_columns
+from inference import ENSEMBLE_ORDER, predict_codes
+from model_artifact import load_artifact, write_artifact
+from model_registry import ModelRegistry
+
+# The pickled models were fitted on DataFrames and warn about plain arrays
+pytestmark = pytest.mark.filterwarnings("ignore:X does not have valid feature names")
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ModelRegistry(check_mtime=False)
+
+
+@pytest.fixture(scope="module")
+def compiled(registry):
+    return compile_registry(registry)
+
+
+def sensor_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    low = {"tempBMP": 10, "humidity": 10, "pressure": 900, "soil": 0, "mq7": 0, "mq5": 0}
+    high = {"tempBMP": 50, "humidity": 90, "pressure": 1020, "soil": 1000, "mq7": 1000, "mq5": 800}
+    columns = {field: rng.uniform(low[field], high[field], n).round(2) for field in SENSOR_FIELDS}
+    return feature_matrix(features_from_columns(columns))
+
+
+# Rows whose features sit exactly on, just below and just above split thresholds
+def boundary_inputs(forest, base, seed=0):
+    rng = np.random.default_rng(seed)
+    split = np.flatnonzero(np.isfinite(forest.threshold))
+    nodes = rng.choice(split, size=min(300, len(split)), replace=False)
+    rows = []
+    for node in nodes:
+        threshold = forest.threshold[node]
+        for value in (threshold, np.nextafter(threshold, -np.inf), np.nextafter(threshold, np.inf),
+                      np.float32(threshold), np.nextafter(np.float32(threshold), np.float32(np.inf))):
+            row = base[rng.integers(len(base))].copy()
+            row[forest.feature[node]] = value
+            rows.append(row)
+    return np.array(rows, dtype=float)
+
+
+@pytest.mark.parametrize("name", ENSEMBLE_ORDER)
+def test_matches_native_predictions(registry, compiled, name):
+    X = sensor_inputs(2000)
+    np.testing.assert_array_equal(compiled.get(name).predict(X), predict_codes(registry.get(name), X))
+
+
+@pytest.mark.parametrize("name", ENSEMBLE_ORDER)
+def test_matches_native_with_missing_values(registry, compiled, name):
+    X = sensor_inputs(2000, seed=1)
+    X[np.random.default_rng(1).random(X.shape) < 0.1] = np.nan
+    np.testing.assert_array_equal(compiled.get(name).predict(X), predict_codes(registry.get(name), X))
+
+
+@pytest.mark.parametrize("name", ENSEMBLE_ORDER)
+def test_matches_native_on_threshold_boundaries(registry, compiled, name):
+    X = boundary_inputs(compiled.get(name), sensor_inputs(200, seed=2))
+    np.testing.assert_array_equal(compiled.get(name).predict(X), predict_codes(registry.get(name), X))
+
+
+def test_artifact_round_trip(compiled, tmp_path):
+    path = str(tmp_path / "models.ffm")
+    write_artifact(path, compiled)
+    loaded = load_artifact(path)
+    X = sensor_inputs(500, seed=3)
+    expected = compiled.predict_batch(X)
+    result = loaded.predict_batch(X)
+    for name in ENSEMBLE_ORDER:
+        np.testing.assert_array_equal(result["codes"][name], expected["codes"][name])
+    np.testing.assert_array_equal(result["vote_codes"], expected["vote_codes"])
+
+
+def test_artifact_checksum_mismatch_is_rejected(compiled, tmp_path):
+    path = str(tmp_path / "models.ffm")
+    write_artifact(path, compiled)
+    with open(path, "r+b") as f:
+        f.seek(-8, 2)
+        f.write(b"\xff" * 8)
+    with pytest.raises(ValueError, match="checksum mismatch"):
+        load_artifact(path)
@@ -0,0 +1,38 @@
+import numpy as np
+
+from fire_indices import DEFAULT_WIND_SPEED, FEATURE_COLUMNS, INDEX_COLUMNS
+from history import HistoryStore
+from inference import ENSEMBLE_ORDER
+from score_cache import ScoreCache
+from state_store import IndexStateStore
+from tiles import TileGrid
+
+READING = {"tempBMP": 30.0, "humidity": 40.0, "pressure": 1000.0, "soil": 300.0, "mq7": 120.0, "mq5": 50.0}
+
+
+def _predict(X):
+    codes = np.digitize(X[:, FEATURE_COLUMNS.index("Temp(C)")], [20, 30, 40])
+    return {"codes": {name: codes for name in ENSEMBLE_ORDER}}
+
+
+# The steps dashboard.py runs on every render with sensor data, minus Streamlit
+def test_dashboard_scoring_path(tmp_path):
+    score_cache = ScoreCache(_predict)
+    index_state = IndexStateStore(str(tmp_path / "state.json"))
+    history = HistoryStore(None)
+    index_state.seed('sensor', {})
+    carry_over = index_state.previous('sensor')
+
+    for _ in range(2):
+        indices, ensemble = score_cache.score_one(READING, DEFAULT_WIND_SPEED, carry_over['dmc'], carry_over['dc'])
+        assert list(indices) == INDEX_COLUMNS
+        assert all(type(value) is float for value in indices.values())
+        ffmc, dmc, dc, isi, bui, fwi = (indices[name] for name in INDEX_COLUMNS)
+        index_state.update('sensor', ffmc, dmc, dc)
+        history.append('sensor', {**READING, "ffmc": ffmc, "dmc": dmc, "dc": dc, "isi": isi, "bui": bui, "fwi": fwi})
+        html = TileGrid().render({**ensemble["features"], "mq5": READING["mq5"], **ensemble["labels"]})
+        assert html.count("class='ff-title'") == 20
+        assert ensemble["vote"][0] == "High"
+
+    assert score_cache.stats()["hits"] == 1
+    assert history.aggregates('sensor', 12)["fwi"]["mean"] == fwi
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from fire_indices import (FEATURE_COLUMNS, calculate_bui, calculate_dmc, calculate_fwi, compute_features, compute_indices,
+                          compute_indices_scalar, feature_matrix)
+
+rng = np.random.default_rng(0)
+N = 200
+TEMP = rng.uniform(-5, 50, N)
+HUMIDITY = rng.uniform(5, 100, N)
+WIND = rng.uniform(0, 30, N)
+PREVIOUS_DMC = rng.uniform(0, 200, N)
+PREVIOUS_DC = rng.uniform(0, 800, N)
+
+
+def test_scalar_wrapper_matches_the_vector_path():
+    vector = compute_indices(TEMP, HUMIDITY, WIND, PREVIOUS_DMC, PREVIOUS_DC)
+    for i in range(0, N, 17):
+        scalar = compute_indices_scalar(TEMP[i], HUMIDITY[i], WIND[i], PREVIOUS_DMC[i], PREVIOUS_DC[i])
+        assert all(type(value) is float for value in scalar.values())
+        assert scalar == pytest.approx({name: float(value[i]) for name, value in vector.items()})
+
+
+def test_dmc_is_previous_plus_daily_factor():
+    indices = compute_indices(TEMP, HUMIDITY, WIND, PREVIOUS_DMC, PREVIOUS_DC)
+    np.testing.assert_allclose(indices["dmc"], PREVIOUS_DMC + indices["k"])
+    np.testing.assert_allclose(indices["dmc"], calculate_dmc(PREVIOUS_DMC, TEMP, HUMIDITY))
+
+
+def test_bui_branches():
+    # DMC <= 0.4 DC
+    assert float(calculate_bui(10.0, 100.0)) == pytest.approx(0.8 * 10 * 100 / (10 + 40))
+    # DMC > 0.4 DC
+    expected = 50 - (1 - 0.8 * 100 / (50 + 40)) * (0.92 + (0.0114 * 50) ** 1.7)
+    assert float(calculate_bui(50.0, 100.0)) == pytest.approx(expected)
+    np.testing.assert_allclose(calculate_bui([10.0, 50.0], [100.0, 100.0]), [calculate_bui(10.0, 100.0), expected])
+
+
+@pytest.mark.parametrize("bui", [0.0, 40.0, 80.0, 80.5, 200.0])
+def test_fwi_factor_branches(bui):
+    if bui <= 80:
+        factor = 0.626 * bui ** 0.809 + 2
+    else:
+        factor = 1000 / (25 + 108.64 * np.exp(-0.023 * bui))
+    assert float(calculate_fwi(10.0, bui)) == pytest.approx(0.1 * 10.0 * factor)
+
+
+def test_negative_bui_clamps_to_zero():
+    with np.errstate(invalid="raise"):
+        fwi = calculate_fwi(np.array([10.0, 10.0]), np.array([-5.0, 0.0]))
+    assert np.isfinite(fwi).all()
+    assert fwi[0] == fwi[1] == pytest.approx(0.1 * 10.0 * 2)
+
+
+def test_features_are_rounded_and_non_negative():
+    features = compute_features(TEMP, HUMIDITY, 1000.0, 300.0, 120.0, WIND, PREVIOUS_DMC, PREVIOUS_DC)
+    X = feature_matrix(features)
+    assert X.shape == (N, len(FEATURE_COLUMNS))
+    for name in ["FFMC", "DMC", "DC", "ISI", "BUI", "FWI"]:
+        assert (features[name] >= 0).all()
+        np.testing.assert_array_equal(features[name], np.round(features[name], 2))
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from history import HistoryStore, StationHistory
+
+FIELDS = ["a", "b", "c"]
+
+
+def brute_force(values, window):
+    recent = values[-window:]
+    positions = np.arange(len(recent))
+    trend = np.polyfit(positions, recent, 1)[0] if len(recent) > 1 else np.zeros(len(FIELDS))
+    return recent.mean(axis=0), recent.min(axis=0), recent.max(axis=0), trend
+
+
+@pytest.mark.parametrize("window", [1, 7, 50])
+def test_aggregates_match_brute_force(window):
+    rng = np.random.default_rng(window)
+    history = StationHistory(FIELDS, capacity=50, windows=(1, 7, 50))
+    appended = []
+    # Enough readings to wrap the buffer and trigger a resync several times
+    for i in range(173):
+        row = rng.normal(20, 5, len(FIELDS)).round(2)
+        history.append(row, timestamp=i)
+        appended.append(row)
+        result = history.aggregates(window)
+        mean, minimum, maximum, trend = brute_force(np.array(appended), window)
+        for j, field in enumerate(FIELDS):
+            assert result[field]["mean"] == pytest.approx(mean[j], abs=1e-9)
+            assert result[field]["min"] == minimum[j]
+            assert result[field]["max"] == maximum[j]
+            assert result[field]["trend"] == pytest.approx(trend[j], abs=1e-9)
+
+
+def test_series_is_oldest_first_and_bounded():
+    history = StationHistory(FIELDS, capacity=5, windows=(5,))
+    for i in range(8):
+        history.append([i, i, i], timestamp=100 + i)
+    times, values = history.series("b")
+    np.testing.assert_array_equal(times, [103, 104, 105, 106, 107])
+    np.testing.assert_array_equal(values, [3, 4, 5, 6, 7])
+    np.testing.assert_array_equal(history.series("b", last=2)[1], [6, 7])
+
+
+def test_repeated_version_is_skipped():
+    history = StationHistory(FIELDS, capacity=5, windows=(5,))
+    assert history.append([1, 2, 3], version=1)
+    assert not history.append([1, 2, 3], version=1)
+    assert history.append([1, 2, 3], version=2)
+    assert len(history) == 2
+
+
+def test_windows_larger_than_capacity_are_rejected():
+    with pytest.raises(ValueError):
+        StationHistory(FIELDS, capacity=5, windows=(10,))
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "history.npz")
+    store = HistoryStore(path, FIELDS, capacity=20, windows=(5,))
+    for i in range(30):
+        store.append("s1", {"a": i, "b": 2 * i, "c": -i}, timestamp=i)
+    store.append("s2", {"a": 1, "b": 1, "c": 1}, timestamp=0)
+    assert store.flush()
+    assert not store.flush()
+
+    loaded = HistoryStore(path, FIELDS, capacity=20, windows=(5,))
+    assert loaded.stations() == ["s1", "s2"]
+    for station in ["s1", "s2"]:
+        np.testing.assert_array_equal(loaded.series(station)[0], store.series(station)[0])
+        np.testing.assert_array_equal(loaded.series(station)[1], store.series(station)[1])
+    assert loaded.aggregates("s1", 5) == store.aggregates("s1", 5)
+
+
+def test_failed_flush_keeps_changes_for_the_next_one(tmp_path):
+    path = str(tmp_path / "missing" / "history.npz")
+    store = HistoryStore(path, FIELDS, capacity=20, windows=(5,))
+    store.append("s1", {"a": 1, "b": 2, "c": 3}, timestamp=0)
+    assert not store.flush()
+    assert store.failed_flushes == 1
+
+    (tmp_path / "missing").mkdir()
+    assert store.flush()
+    assert HistoryStore(path, FIELDS, capacity=20, windows=(5,)).stations() == ["s1"]
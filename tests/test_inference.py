@@ -0,0 +1,61 @@
+from collections import Counter
+
+import numpy as np
+
+from inference import ENSEMBLE_ORDER, RISK_LABELS, majority_vote, predict_batch
+
+
+def counter_vote(codes):
+    winners, counts = [], []
+    for column in np.asarray(codes).T:
+        code, count = Counter(column.tolist()).most_common(1)[0]
+        winners.append(code)
+        counts.append(count)
+    return np.array(winners), np.array(counts)
+
+
+def test_majority_vote_matches_counter():
+    codes = np.random.default_rng(0).integers(0, 4, size=(5, 5000))
+    vote, count = majority_vote(codes)
+    expected_vote, expected_count = counter_vote(codes)
+    np.testing.assert_array_equal(vote, expected_vote)
+    np.testing.assert_array_equal(count, expected_count)
+
+
+def test_ties_go_to_the_earliest_model():
+    codes = np.array([
+        [2, 0, 3, 1],
+        [1, 0, 3, 2],
+        [1, 1, 0, 3],
+        [2, 1, 0, 0],
+        [3, 2, 1, 1],
+    ])
+    vote, count = majority_vote(codes)
+    np.testing.assert_array_equal(vote, [2, 0, 3, 1])
+    np.testing.assert_array_equal(count, [2, 2, 2, 2])
+    np.testing.assert_array_equal(vote, counter_vote(codes)[0])
+
+
+class _Constant:
+    def __init__(self, code):
+        self.code = code
+
+    def predict(self, X):
+        return np.full((len(X), 1), self.code)
+
+
+class _Registry:
+    def __init__(self, codes):
+        self.models = {name: _Constant(code) for name, code in zip(ENSEMBLE_ORDER, codes)}
+
+    def get(self, name):
+        return self.models[name]
+
+
+def test_predict_batch_layout():
+    result = predict_batch(np.zeros((3, 14)), _Registry([2, 1, 2, 3, 1]))
+    assert set(result["codes"]) == set(ENSEMBLE_ORDER)
+    np.testing.assert_array_equal(result["vote_codes"], [2, 2, 2])
+    np.testing.assert_array_equal(result["vote"], RISK_LABELS[[2, 2, 2]])
+    np.testing.assert_array_equal(result["vote_count"], [2, 2, 2])
+    assert result["labels"]["catboost"].tolist() == ["Extreme"] * 3
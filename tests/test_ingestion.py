@@ -0,0 +1,65 @@
+import json
+import time
+
+from ingestion import FileBackend, LocalBackend, SensorFeed, apply_event
+
+READING = {"tempBMP": 30.0, "humidity": 40.0}
+
+
+def test_apply_event_put_patch_and_delete():
+    snapshot = apply_event(None, "put", "/", {"a": {"x": 1, "y": 2}})
+    assert snapshot == {"a": {"x": 1, "y": 2}}
+    assert apply_event(snapshot, "put", "/a", {"z": 3}) == {"a": {"z": 3}}
+    assert apply_event(snapshot, "patch", "/a", {"y": 5, "z": 3}) == {"a": {"x": 1, "y": 5, "z": 3}}
+    assert apply_event(snapshot, "put", "/a/x", None) == {"a": {"y": 2}}
+    assert apply_event(snapshot, "put", "/a", None) == {}
+    assert apply_event(snapshot, "put", "/b/c", 1) == {"a": {"x": 1, "y": 2}, "b": {"c": 1}}
+    # The input snapshot is never modified
+    assert snapshot == {"a": {"x": 1, "y": 2}}
+
+
+def test_multi_station_add_and_remove():
+    backend = LocalBackend({"stations": {"s1": READING}})
+    feed = SensorFeed(backend, "/stations", multi_station=True).start(timeout=1)
+    calls = []
+    feed.subscribe(lambda station, reading: calls.append((station, reading)))
+    assert feed.stations() == ["s1"]
+
+    backend.set("/stations/s2", {**READING, "tempBMP": 31.0})
+    assert feed.stations() == ["s1", "s2"]
+    assert feed.latest("s2")["tempBMP"] == 31.0
+    backend.set("/stations/s1", None)
+    assert feed.stations() == ["s2"]
+    assert feed.latest("s1") is None
+    assert calls == [("s2", {**READING, "tempBMP": 31.0}), ("s1", None)]
+
+
+def test_no_callback_when_unchanged():
+    backend = LocalBackend({"sensor": READING})
+    feed = SensorFeed(backend, "/sensor").start(timeout=1)
+    calls = []
+    feed.subscribe(lambda station, reading: calls.append(station))
+    version = feed.station_version()
+
+    backend.update("/sensor", {"tempBMP": 30.0})
+    assert calls == [] and feed.station_version() == version
+    backend.update("/sensor", {"tempBMP": 35.0})
+    assert calls == ["sensor"] and feed.station_version() == version + 1
+    assert feed.latest() == {**READING, "tempBMP": 35.0}
+    assert feed.events == 3
+
+
+def test_file_backend_missing_file_does_not_block_start(tmp_path):
+    path = tmp_path / "db.json"
+    feed = SensorFeed(FileBackend(str(path), interval=0.01), "/sensor")
+    start = time.monotonic()
+    feed.start(timeout=5)
+    assert time.monotonic() - start < 1
+    assert feed.latest() is None
+
+    path.write_text(json.dumps({"sensor": READING}))
+    deadline = time.monotonic() + 5
+    while feed.latest() is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert feed.latest() == READING
+    feed.stop()
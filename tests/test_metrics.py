@@ -0,0 +1,69 @@
+import urllib.request
+
+import pytest
+
+from metrics import METRIC_NAME, Histogram, Metrics, SamplingProfiler
+
+
+def test_histogram_buckets_are_upper_inclusive():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in [0.05, 0.1, 0.1000001, 1.0, 5.0]:
+        histogram.observe(value)
+    # le semantics: a value equal to a bound belongs to that bound's bucket
+    assert histogram.counts == [2, 2, 1]
+    assert histogram.count == 5 and histogram.max == 5.0
+    assert histogram.sum == pytest.approx(6.2500001)
+    assert histogram.quantile(0.4) == 0.1
+    assert histogram.quantile(0.8) == 1.0
+    assert histogram.quantile(1.0) == 5.0
+    assert Histogram().quantile(0.5) is None
+
+
+def test_render_prometheus_exposition_format():
+    metrics = Metrics(enabled=True, buckets=(0.1, 1.0))
+    metrics.observe("score", 0.1)
+    metrics.observe("score", 0.5)
+    metrics.observe("read", 2.0)
+    assert metrics.render().splitlines() == [
+        f"# HELP {METRIC_NAME} Latency of each scoring pipeline stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+        f'{METRIC_NAME}_bucket{{stage="read",le="0.1"}} 0',
+        f'{METRIC_NAME}_bucket{{stage="read",le="1.0"}} 0',
+        f'{METRIC_NAME}_bucket{{stage="read",le="+Inf"}} 1',
+        f'{METRIC_NAME}_sum{{stage="read"}} 2.0',
+        f'{METRIC_NAME}_count{{stage="read"}} 1',
+        f'{METRIC_NAME}_bucket{{stage="score",le="0.1"}} 1',
+        f'{METRIC_NAME}_bucket{{stage="score",le="1.0"}} 2',
+        f'{METRIC_NAME}_bucket{{stage="score",le="+Inf"}} 2',
+        f'{METRIC_NAME}_sum{{stage="score"}} 0.6',
+        f'{METRIC_NAME}_count{{stage="score"}} 2',
+    ]
+    assert metrics.render().endswith("\n")
+
+
+def test_disabled_timer_records_nothing():
+    metrics = Metrics()
+    with metrics.timer("score"):
+        pass
+    assert metrics.summary() == {}
+
+
+def test_serve_binds_localhost_by_default():
+    metrics = Metrics(enabled=True)
+    metrics.observe("score", 0.01)
+    port = metrics.serve(0)
+    assert metrics._server.server_address[0] == "127.0.0.1"
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+        assert f'{METRIC_NAME}_count{{stage="score"}} 1' in response.read().decode()
+    metrics._server.shutdown()
+
+
+def test_dump_errors_are_logged_not_raised(tmp_path):
+    path = str(tmp_path / "missing" / "metrics.prom")
+    metrics = Metrics(enabled=True)
+    metrics._dump_logged(path)
+    assert metrics.failed_dumps == 1
+
+    profiler = SamplingProfiler(path=path)
+    profiler._dump_logged()
+    assert profiler.failed_dumps == 1
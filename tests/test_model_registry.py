@@ -0,0 +1,40 @@
+import os
+
+import joblib
+import pytest
+
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    joblib.dump({"version": 1}, tmp_path / "a.pkl")
+    joblib.dump({"version": 1}, tmp_path / "b.pkl")
+    return ModelRegistry({"a": "a.pkl", "b": "b.pkl"}, base_dir=str(tmp_path))
+
+
+def test_models_load_lazily_and_once(registry):
+    assert not any(info["loaded"] for info in registry.stats().values())
+    first = registry.get("a")
+    assert registry.get("a") is first
+    stats = registry.stats()
+    assert stats["a"]["loads"] == 1
+    assert not stats["b"]["loaded"]
+
+
+def test_changed_file_is_reloaded(registry, tmp_path):
+    assert registry.get("a") == {"version": 1}
+    path = tmp_path / "a.pkl"
+    joblib.dump({"version": 2}, path)
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert registry.get("a") == {"version": 2}
+    assert registry.stats()["a"]["loads"] == 2
+
+
+def test_mtime_check_can_be_disabled(tmp_path):
+    joblib.dump({"version": 1}, tmp_path / "a.pkl")
+    registry = ModelRegistry({"a": "a.pkl"}, base_dir=str(tmp_path), check_mtime=False)
+    registry.get("a")
+    os.remove(tmp_path / "a.pkl")
+    assert registry.get("a") == {"version": 1}
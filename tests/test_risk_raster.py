@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from inference import RISK_LABELS
+from risk_raster import NODATA, IDWInterpolator, RasterGrid, RiskRaster, mock_stations
+
+
+# Risk code from temperature alone, so interpolation effects are easy to follow
+class _Ensemble:
+    def predict_batch(self, X):
+        codes = np.digitize(X[:, 0], [20, 30, 40])
+        return {"vote_codes": codes, "vote": RISK_LABELS[codes], "vote_count": np.full(len(X), 5)}
+
+
+@pytest.fixture
+def grid():
+    return RasterGrid(18.9, 19.0, 72.8, 72.9, 0.002)
+
+
+def test_incremental_update_matches_full_rebuild(grid):
+    stations, readings = mock_stations(grid, 20, seed=1)
+    raster = RiskRaster(grid, stations, _Ensemble(), tile_size=16)
+    assert raster.update(readings) == grid.size
+    changed = {"station-0003": {**readings["station-0003"], "tempBMP": 45.0}}
+    rescored = raster.update(changed)
+    assert 0 < rescored < grid.size
+    assert raster.update(changed) == 0
+
+    rebuilt = RiskRaster(grid, stations, _Ensemble(), tile_size=16)
+    rebuilt.update({**readings, **changed})
+    np.testing.assert_array_equal(raster.risk, rebuilt.risk)
+    np.testing.assert_allclose(raster.bands["FWI"], rebuilt.bands["FWI"], equal_nan=True)
+
+
+def test_cell_on_a_station_takes_its_value():
+    grid = RasterGrid(0.0, 0.01, 0.0, 0.01, 0.001)
+    interpolator = IDWInterpolator([0.0005, 0.0095], [0.0005, 0.0095], grid, k=2)
+    values = interpolator.interpolate(np.array([[10.0], [30.0]]))
+    assert values[(grid.rows - 1) * grid.cols, 0] == pytest.approx(10.0)
+    assert values[grid.cols - 1, 0] == pytest.approx(30.0)
+
+
+def test_stations_without_values_are_left_out(grid):
+    stations, readings = mock_stations(grid, 10, seed=2)
+    raster = RiskRaster(grid, stations, _Ensemble(), max_distance=5000)
+    del readings["station-0000"]
+    raster.update(readings)
+    # Every cell in range of another station is still scored
+    covered = raster.interpolator.covered
+    assert (raster.risk[covered] != NODATA).all()
+
+
+def test_mock_stations_do_not_touch_the_global_random_state(grid):
+    random.seed(123)
+    expected = random.random()
+    random.seed(123)
+    first = mock_stations(grid, 5, seed=7)
+    assert random.random() == expected
+    assert mock_stations(grid, 5, seed=7) == first
+
+
+def test_tiles_and_index_are_written(grid, tmp_path):
+    import json
+    stations, readings = mock_stations(grid, 10, seed=3)
+    raster = RiskRaster(grid, stations, _Ensemble(), tile_size=16)
+    raster.update(readings)
+    written = raster.write_tiles(str(tmp_path))
+    index = json.loads((tmp_path / "index.json").read_text())
+    assert written == len(index["tiles"]) == 16
+    assert index["geotransform"] == grid.geotransform
+    assert raster.write_tiles(str(tmp_path)) == 0
+    with np.load(tmp_path / index["tiles"][0]["file"]) as tile:
+        assert tile["risk"].dtype == np.uint8 and tile["risk"].shape == (16, 16)
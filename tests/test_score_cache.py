@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from fire_indices import FEATURE_COLUMNS
+from inference import ENSEMBLE_ORDER
+from score_cache import ScoreCache
+
+READING = {"tempBMP": 30.0, "humidity": 40.0, "pressure": 1000.0, "soil": 300.0, "mq7": 120.0, "mq5": 50.0}
+
+
+# Deterministic stand-in for predict_batch that records the rows it scored
+class _Predict:
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, X):
+        self.rows.append(len(X))
+        codes = np.digitize(X[:, FEATURE_COLUMNS.index("Temp(C)")], [20, 30, 40])
+        return {"codes": {name: (codes + m) % 4 for m, name in enumerate(ENSEMBLE_ORDER)}}
+
+
+def reading(**changes):
+    return {**READING, **changes}
+
+
+def test_hits_and_misses_are_counted():
+    predict = _Predict()
+    cache = ScoreCache(predict)
+    cache.score([reading()])
+    cache.score([reading(), reading(tempBMP=31.0)])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert stats["hit_rate"] == pytest.approx(1 / 3)
+    # Only the missing reading was scored the second time
+    assert predict.rows == [1, 1]
+
+
+def test_readings_within_one_step_share_an_entry():
+    cache = ScoreCache(_Predict())
+    cache.score([reading(tempBMP=30.001)])
+    cache.score([reading(tempBMP=29.999)])
+    assert cache.stats()["hits"] == 1
+
+
+def test_context_is_part_of_the_key():
+    cache = ScoreCache(_Predict())
+    cache.score([reading()], previous_dmc=25)
+    cache.score([reading()], previous_dmc=26)
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ScoreCache(_Predict(), max_entries=2)
+    cache.score([reading(tempBMP=10.0)])
+    cache.score([reading(tempBMP=20.0)])
+    cache.score([reading(tempBMP=10.0)])
+    cache.score([reading(tempBMP=30.0)])
+    stats = cache.stats()
+    assert (stats["evictions"], stats["entries"]) == (1, 2)
+    cache.score([reading(tempBMP=10.0)])
+    assert cache.stats()["hits"] == 2
+    cache.score([reading(tempBMP=20.0)])
+    assert cache.stats()["misses"] == 4
+
+
+def test_expired_entries_are_rescored():
+    predict = _Predict()
+    cache = ScoreCache(predict, ttl=0)
+    cache.score([reading()])
+    cache.score([reading()])
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (0, 2, 1)
+    assert predict.rows == [1, 1]
+
+
+def test_cached_result_matches_uncached():
+    readings = [reading(tempBMP=t) for t in (15.0, 25.0, 35.0, 45.0)]
+    cache = ScoreCache(_Predict())
+    first = cache.score(readings)
+    second = cache.score(readings[::-1])
+    uncached = ScoreCache(_Predict(), max_entries=0).score(readings[::-1])
+    assert cache.stats()["hits"] == 4
+    for name in ENSEMBLE_ORDER:
+        np.testing.assert_array_equal(second["codes"][name], first["codes"][name][::-1])
+        np.testing.assert_array_equal(second["codes"][name], uncached["codes"][name])
+    np.testing.assert_array_equal(second["vote_codes"], uncached["vote_codes"])
+    for name in FEATURE_COLUMNS:
+        np.testing.assert_allclose(second["features"][name], uncached["features"][name])
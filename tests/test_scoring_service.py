@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from fire_indices import SENSOR_FIELDS
+from inference import RISK_LABELS
+from scoring_service import ScoringService, validate_reading
+
+READING = {"tempBMP": 30.0, "humidity": 40.0, "pressure": 1000.0, "soil": 300.0, "mq7": 120.0, "mq5": 50.0}
+
+
+# Votes Medium for every row and fails on any row with a NaN feature
+class _Ensemble:
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, X):
+        self.batches.append(len(X))
+        if np.isnan(X).any():
+            raise ValueError("NaN feature")
+        codes = np.ones(len(X), dtype=np.int64)
+        return {"labels": {"xgboost": RISK_LABELS[codes]}, "vote": RISK_LABELS[codes], "vote_codes": codes,
+                "vote_count": np.full(len(X), 5)}
+
+
+def run(coroutine_fn):
+    async def main():
+        service = ScoringService(_Ensemble(), max_wait=0.02)
+        service.batcher.start()
+        try:
+            return await coroutine_fn(service)
+        finally:
+            await service.batcher.stop()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("body, message", [
+    (b"{not json", "Expecting"),
+    (b'{"readings": null}', "readings must be a list"),
+    (b'{"readings": 5}', "readings must be a list"),
+    (b'{"readings": {"tempBMP": 1}}', "readings must be a list"),
+    (b'{"readings": [5]}', "JSON object"),
+    (b"[1, 2]", "JSON object"),
+    (json.dumps({"tempBMP": 1}).encode(), "missing"),
+    (json.dumps({**READING, "humidity": "40"}).encode(), "humidity must be a finite number"),
+    (json.dumps({**READING, "soil": True}).encode(), "soil must be a finite number"),
+    (b'{"tempBMP": NaN, "humidity": 1, "pressure": 1, "soil": 1, "mq7": 1, "mq5": 1}', "tempBMP must be a finite number"),
+])
+def test_bad_requests_get_400(body, message):
+    status, payload = run(lambda service: service._route("POST", "/score", body))
+    assert status == 400
+    assert message in payload["error"]
+
+
+def test_unknown_path_and_method():
+    assert run(lambda service: service._route("GET", "/nope", b""))[0] == 404
+    assert run(lambda service: service._route("GET", "/score", b""))[0] == 405
+
+
+def test_single_and_batched_readings():
+    status, payload = run(lambda service: service._route("POST", "/score", json.dumps(READING).encode()))
+    assert status == 200 and payload["vote"] == "Medium"
+    body = json.dumps({"readings": [READING, {**READING, "station": "b"}]}).encode()
+    status, payload = run(lambda service: service._route("POST", "/score", body))
+    assert status == 200
+    assert [result["station"] for result in payload["results"]] == [None, "b"]
+
+
+def test_bad_reading_fails_only_its_own_caller():
+    async def submit_both(service):
+        bad = {**READING, "tempBMP": float("nan")}
+        return await asyncio.gather(service.batcher.submit(READING), service.batcher.submit(bad),
+                                    return_exceptions=True)
+    good, bad = run(submit_both)
+    assert good["vote"] == "Medium"
+    assert isinstance(bad, ValueError)
+
+
+def _http(raw):
+    async def request(service):
+        server = await asyncio.start_server(service._handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+    return run(request)
+
+
+def test_invalid_body_gets_a_response_over_http():
+    body = b'{"readings": null}'
+    response = _http(b"POST /score HTTP/1.1\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(body), body))
+    assert response.startswith(b"HTTP/1.1 400")
+    assert b"readings must be a list" in response
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+def test_malformed_content_length_gets_400(length):
+    response = _http(b"POST /score HTTP/1.1\r\nContent-Length: %s\r\n\r\n" % length)
+    assert response.startswith(b"HTTP/1.1 400")
+
+
+def test_validate_reading_accepts_every_sensor_field():
+    assert validate_reading(dict(READING)) == READING
+    assert set(SENSOR_FIELDS) <= set(READING)
@@ -0,0 +1,93 @@
+import pytest
+
+from fire_indices import DEFAULT_PREVIOUS_DC, DEFAULT_PREVIOUS_DMC
+from state_store import IndexStateStore
+
+DAY = "2026-06-01"
+NEXT_DAY = "2026-06-02"
+
+
+class _Writer:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.updates = []
+
+    def __call__(self, updates):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("write failed")
+        self.updates.append(updates)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "state.json")
+
+
+def test_readings_of_a_day_start_from_the_previous_days_final_values(path):
+    store = IndexStateStore(path)
+    store.seed("s", {"previous_dmc": 30.0, "previous_dc": 90.0}, day=DAY)
+    store.update("s", 80.0, 31.0, 91.0, day=DAY)
+    store.update("s", 81.0, 32.0, 92.0, day=DAY)
+    assert store.previous("s", DAY) == {"dmc": 30.0, "dc": 90.0, "ffmc": None}
+    assert store.previous("s", NEXT_DAY) == {"dmc": 32.0, "dc": 92.0, "ffmc": 81.0}
+
+    store.update("s", 82.0, 33.0, 93.0, day=NEXT_DAY)
+    assert store.previous("s", NEXT_DAY) == {"dmc": 32.0, "dc": 92.0, "ffmc": 81.0}
+
+
+def test_failed_flush_is_retried(path):
+    writer = _Writer(failures=1)
+    store = IndexStateStore(path, writer)
+    store.update("s", 80.0, 31.0, 91.0, day=DAY)
+    assert store.flush() == 0
+    assert store.failed_flushes == 1 and writer.updates == []
+
+    assert store.flush() == 1
+    assert writer.updates[0]["s"]["previous_dmc"] == 31.0
+    assert store.flush() == 0
+    assert store.flushes == 1
+
+
+def test_default_seed_is_replaced_by_stored_values(path):
+    store = IndexStateStore(path)
+    store.seed("s", {}, day=DAY)
+    assert store.previous("s", DAY)["dmc"] == DEFAULT_PREVIOUS_DMC
+    store.seed("s", {"previous_dmc": 30.0, "previous_dc": 90.0}, day=DAY)
+    assert store.previous("s", DAY)["dmc"] == 30.0
+    # Stored values are never replaced by a later seed
+    store.seed("s", {"previous_dmc": 50.0, "previous_dc": 150.0}, day=DAY)
+    assert store.previous("s", DAY)["dmc"] == 30.0
+
+
+def test_updated_station_is_not_reseeded(path):
+    store = IndexStateStore(path)
+    store.seed("s", {}, day=DAY)
+    store.update("s", 80.0, 31.0, 91.0, day=DAY)
+    store.seed("s", {"previous_dmc": 50.0, "previous_dc": 150.0}, day=DAY)
+    assert store.previous("s", DAY) == {"dmc": DEFAULT_PREVIOUS_DMC, "dc": DEFAULT_PREVIOUS_DC, "ffmc": None}
+
+
+@pytest.mark.parametrize("restart_day, expected", [(DAY, (30.0, 90.0)), (NEXT_DAY, (32.0, 92.0))])
+def test_restart_without_local_state_recovers_from_the_backend(tmp_path, restart_day, expected):
+    writer = _Writer()
+    store = IndexStateStore(str(tmp_path / "first.json"), writer)
+    store.seed("s", {"previous_dmc": 30.0, "previous_dc": 90.0}, day=DAY)
+    store.update("s", 80.0, 31.0, 91.0, day=DAY)
+    store.update("s", 81.0, 32.0, 92.0, day=DAY)
+    store.flush()
+
+    # A new host: no local file, only what the writer pushed
+    restarted = IndexStateStore(str(tmp_path / "second.json"))
+    restarted.seed("s", writer.updates[-1]["s"], day=restart_day)
+    carry = restarted.previous("s", restart_day)
+    assert (carry["dmc"], carry["dc"]) == expected
+
+
+def test_local_state_survives_a_restart(path):
+    store = IndexStateStore(path)
+    store.update("s", 80.0, 31.0, 91.0, day=DAY)
+    store.flush()
+    restarted = IndexStateStore(path)
+    assert "s" in restarted
+    assert restarted.previous("s", NEXT_DAY) == {"dmc": 31.0, "dc": 91.0, "ffmc": 80.0}
@@ -0,0 +1,40 @@
+from fire_indices import SENSOR_FIELDS
+from station_reader import MockReadBackend, StationReader
+
+READING = {"tempBMP": 30.0, "humidity": 40.0, "pressure": 1000.0, "soil": 300.0, "mq7": 120.0, "mq5": 50.0}
+
+
+# Blocking backend serving a fixed tree of paths
+class _DictBackend:
+    def __init__(self, data):
+        self.data = data
+
+    def get(self, path):
+        value = self.data[path]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+def test_stations_with_the_same_last_segment_stay_apart():
+    backend = _DictBackend({"/a/sensor": READING, "/b/sensor": {**READING, "tempBMP": 40.0}})
+    batch = StationReader(backend).read_sync(["/a/sensor", "/b/sensor"])
+    assert batch.stations == ["/a/sensor", "/b/sensor"]
+    assert batch.columns["tempBMP"].tolist() == [30.0, 40.0]
+
+
+def test_caller_ids_and_errors_by_path():
+    backend = _DictBackend({"/a/sensor": READING, "/b/sensor": {"tempBMP": 1.0}, "/c/sensor": ConnectionError("down")})
+    batch = StationReader(backend).read_sync({"a": "/a/sensor", "b": "/b/sensor", "c": "/c/sensor"})
+    assert batch.stations == ["a"] and batch.paths == ["/a/sensor"]
+    assert batch.errors["/b/sensor"].startswith("missing")
+    assert batch.errors["/c/sensor"] == "ConnectionError: down"
+    assert batch.matrix().shape == (1, 14)
+
+
+def test_hung_reads_time_out():
+    reader = StationReader(MockReadBackend(latency=0.0, jitter=0.0, hang_rate=1.0, seed=0), timeout=0.05)
+    batch = reader.read_sync([f"/s/{i}" for i in range(3)])
+    assert len(batch) == 0
+    assert set(batch.columns) == set(SENSOR_FIELDS)
+    assert all(error.startswith("timed out") for error in batch.errors.values())
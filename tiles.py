@@ -0,0 +1,133 @@
+import html
+
+import numpy as np
+
+GREEN = "#32CD32"
+YELLOW = "#FFD700"
+ORANGE = "#FF8C00"
+RED = "#FF4500"
+
+# Dashboard tiles as data. Numeric tiles take the color of the first matching
+# (op, bound, color) rule, else `default`; label tiles look their value up in
+# `colors`. `digits` rounds the shown value (None shows it as read).
+SENSOR_TILES = [
+    {"key": "Temp(C)", "title": "Temp (°C)", "rules": [("<", 35, GREEN), ("<=", 45, YELLOW)], "default": RED, "digits": None},
+    {"key": "Humidity", "title": "Humidity %", "rules": [(">", 60, GREEN), (">=", 30, YELLOW)], "default": RED, "digits": None},
+    {"key": "Pressure", "title": "Pressure (hPa)", "rules": [(">=", 900, GREEN), ("<", 500, YELLOW)], "default": RED, "digits": None},
+    {"key": "Temp(K)", "title": "Temp (K)", "rules": [("<", 308, GREEN), ("<=", 318, YELLOW)], "default": RED, "digits": None},
+    {"key": "Soil Moisture", "title": "Soil Moisture", "rules": [("<", 600, GREEN), ("<=", 800, YELLOW)], "default": RED, "digits": None},
+    {"key": "Smoke Density", "title": "Smoke Density (ppm)", "rules": [("<", 400, GREEN), ("<=", 850, YELLOW)], "default": RED, "digits": None},
+    {"key": "mq5", "title": "MQ5(ppm)", "rules": [("<", 500, GREEN), ("<=", 600, YELLOW)], "default": RED, "digits": None},
+    {"key": "Air Density", "title": "Air Density (kg/m³)", "rules": [(">", 1.05, GREEN), (">", 0.9, YELLOW)], "default": RED, "digits": 3},
+    {"key": "Wind Speed", "title": "Wind Speed (Km/h)", "rules": [("<", 8, GREEN), ("<=", 12, YELLOW)], "default": RED, "digits": 2},
+    {"key": "FFMC", "title": "FFMC", "rules": [("<", 45, GREEN), ("<=", 75, YELLOW)], "default": RED, "digits": 2},
+    {"key": "DMC", "title": "DMC", "rules": [("<", 35, GREEN), ("<=", 70, YELLOW)], "default": RED, "digits": 2},
+    {"key": "DC", "title": "DC", "rules": [("<", 300, GREEN), ("<=", 500, YELLOW)], "default": RED, "digits": 2},
+    {"key": "ISI", "title": "ISI", "rules": [("<", 8, GREEN), ("<=", 16, YELLOW)], "default": RED, "digits": 2},
+    {"key": "BUI", "title": "BUI", "rules": [("<", 50, GREEN), ("<=", 90, YELLOW)], "default": RED, "digits": 2},
+    {"key": "FWI", "title": "FWI", "rules": [("<", 12, GREEN), ("<=", 27, YELLOW), ("<=", 36, ORANGE)], "default": RED, "digits": 2},
+]
+
+RISK_COLORS = {"Low": GREEN, "Medium": YELLOW, "High": ORANGE}
+MODEL_TILES = [
+    {"key": "xgboost", "title": "XGBoost", "colors": RISK_COLORS, "default": RED},
+    {"key": "decision_tree", "title": "Decision Tree", "colors": RISK_COLORS, "default": RED},
+    {"key": "random_forest", "title": "Random Forest", "colors": RISK_COLORS, "default": RED},
+    {"key": "catboost", "title": "CatBoost", "colors": RISK_COLORS, "default": RED},
+    {"key": "lightgbm", "title": "LightGBM", "colors": RISK_COLORS, "default": RED},
+]
+
+DASHBOARD_SECTIONS = [SENSOR_TILES, MODEL_TILES]
+
+_OPS = {"<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal}
+
+GRID_STYLE = """<style>
+.ff-grid {display: grid; grid-template-columns: repeat(5, minmax(0, 1fr)); gap: 16px; margin-bottom: 16px;}
+.ff-title {font-weight: bold; margin-bottom: 8px;}
+.ff-value {padding: 10px; text-align: center; border-radius: 8px; font-size: 18px; font-weight: bold;}
+.ff-station {font-size: 20px; font-weight: bold; margin: 8px 0;}
+</style>"""
+
+
+# Tile colors for N stations at once
+def tile_colors(spec, values):
+    if "colors" in spec:
+        values = np.asarray(values, dtype=object)
+        return np.array([spec["colors"].get(value, spec["default"]) for value in values.tolist()], dtype=object)
+    values = np.asarray(values, dtype=float)
+    conditions = [_OPS[op](values, bound) for op, bound, _ in spec["rules"]]
+    return np.select(conditions, [color for _, _, color in spec["rules"]], spec["default"]).astype(object)
+
+
+def _format(value, digits):
+    if isinstance(value, str):
+        return value
+    if digits is not None:
+        return str(round(float(value), digits))
+    return np.format_float_positional(float(value), trim="-")
+
+
+# Shown text for N stations at once
+def tile_texts(spec, values):
+    digits = spec.get("digits")
+    return [_format(value, digits) for value in np.atleast_1d(values).tolist()]
+
+
+# Whole tile grid as one HTML block. Each tile's markup is cached by
+# (title, text, color) and only rebuilt when one of them changes; the grid
+# string is reassembled only when some tile changed since the last render.
+class TileGrid:
+    def __init__(self, sections=DASHBOARD_SECTIONS, max_fragments=4096):
+        self.sections = sections
+        self.max_fragments = max_fragments
+        self.renders = 0
+        self.changed_tiles = 0
+        self._fragments = {}
+        self._state = {}
+        self._html = None
+        self._stations = None
+
+    def _fragment(self, title, text, color):
+        key = (title, text, color)
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            if len(self._fragments) >= self.max_fragments:
+                self._fragments.clear()
+            fragment = self._fragments[key] = (
+                f"<div><div class='ff-title'>{html.escape(title)}</div>"
+                f"<div class='ff-value' style='background-color: {color};'>{html.escape(text)}</div></div>"
+            )
+        return fragment
+
+    # `columns` maps tile keys to one value per station (scalars for one station)
+    def render(self, columns, stations=None):
+        self.renders += 1
+        n = len(np.atleast_1d(columns[self.sections[0][0]["key"]]))
+        state = {}
+        for section_index, section in enumerate(self.sections):
+            for spec in section:
+                values = np.atleast_1d(columns[spec["key"]])
+                if len(values) != n:
+                    raise ValueError(f"tile {spec['key']!r} has {len(values)} values, expected {n}")
+                for station, (text, color) in enumerate(zip(tile_texts(spec, values), tile_colors(spec, values))):
+                    state[(station, section_index, spec["key"])] = (spec["title"], text, color)
+        changed = {key for key, tile in state.items() if self._state.get(key) != tile}
+        self.changed_tiles += len(changed)
+        if changed or self._html is None or set(state) != set(self._state) or stations != self._stations:
+            parts = [GRID_STYLE]
+            for station in range(n):
+                if stations is not None:
+                    parts.append(f"<div class='ff-station'>{html.escape(str(stations[station]))}</div>")
+                for section_index, section in enumerate(self.sections):
+                    if section_index:
+                        parts.append("<hr>")
+                    parts.append("<div class='ff-grid'>")
+                    parts.extend(self._fragment(*state[(station, section_index, spec["key"])]) for spec in section)
+                    parts.append("</div>")
+            self._html = "".join(parts)
+            self._stations = stations
+        self._state = state
+        return self._html
+
+    def stats(self):
+        return {"renders": self.renders, "changed_tiles": self.changed_tiles, "fragments": len(self._fragments)}
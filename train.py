@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+from fire_indices import FEATURE_COLUMNS
+from inference import ENSEMBLE_ORDER, RISK_LABELS, RISK_MAP
+from model_registry import MODEL_FILES, file_sha256
+
+DEFAULT_SEED = 42
+DEFAULT_TEST_SIZE = 0.2
+REPORT_FILE = "training_report.json"
+SPLITS = ["X_train", "X_test", "y_train", "y_test"]
+
+
+# Same estimators and hyperparameters as trained_model.ipynb; `threads` is the
+# per-model thread budget handed to each library's own parallelism setting and
+# `params` overrides hyperparameters (e.g. the best ones found by tune.py)
+def build_model(name, threads, seed, params=None):
+    params = params or {}
+    if name == "xgboost":
+        import xgboost as xgb
+        return xgb.XGBClassifier(**{"eval_metric": "mlogloss", **params, "n_jobs": threads, "random_state": seed})
+    if name == "decision_tree":
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(**{**params, "random_state": seed})
+    if name == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(**{**params, "random_state": seed, "n_jobs": threads})
+    if name == "catboost":
+        from catboost import CatBoostClassifier
+        return CatBoostClassifier(**{"iterations": 500, "learning_rate": 0.1, "depth": 6, **params, "verbose": 0,
+                                     "random_state": seed, "thread_count": threads, "allow_writing_files": False})
+    if name == "lightgbm":
+        import lightgbm as lgb
+        return lgb.LGBMClassifier(**{"verbosity": -1, **params, "n_jobs": threads, "random_state": seed})
+    raise ValueError(f"unknown model {name!r}, expected one of {ENSEMBLE_ORDER}")
+
+
+# Dataset.csv -> float32 feature matrix in FEATURE_COLUMNS order and int risk codes
+def load_dataset(path):
+    import pandas as pd
+    df = pd.read_csv(path)
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    y = df["Risk"].map(RISK_MAP)
+    if y.isna().any():
+        raise ValueError(f"unknown Risk labels in {path}: {sorted(df['Risk'][y.isna()].unique())}")
+    return X, y.to_numpy(dtype=np.int64)
+
+
+# Copy the split arrays into one shared memory block; returns it and the
+# (name, dtype, shape, offset) layout workers use to map them without copying
+def share_arrays(arrays):
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += -(-array.nbytes // 64) * 64
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, shape, start), array in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype, buffer=block.buf, offset=start)[...] = array
+    return block, layout
+
+
+# Split arrays mapped from the shared block, filled in each worker by attach_shared
+shared_arrays = {}
+
+
+# Worker initializer: limit native thread pools and map the shared split arrays
+def attach_shared(block_name, layout, threads):
+    for variable in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]:
+        os.environ[variable] = str(threads)
+    block = shared_memory.SharedMemory(name=block_name)
+    shared_arrays["block"] = block
+    for name, dtype, shape, offset in layout:
+        shared_arrays[name] = np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+
+
+# Fit one model on the shared split, write its pickle and return its report
+def fit_model(name, threads, seed, output_dir, params=None):
+    import joblib
+    X_train, X_test, y_train, y_test = (shared_arrays[split] for split in SPLITS)
+    model = build_model(name, threads, seed, params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    predictions = np.asarray(model.predict(X_test)).reshape(len(X_test)).astype(np.int64)
+    predict_seconds = time.perf_counter() - start
+    path = os.path.join(output_dir, MODEL_FILES[name])
+    joblib.dump(model, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    per_class = {
+        str(RISK_LABELS[code]): float((predictions[y_test == code] == code).mean()) if (y_test == code).any() else None
+        for code in range(len(RISK_LABELS))
+    }
+    return {
+        "model": name,
+        "file": MODEL_FILES[name],
+        "sha256": file_sha256(path),
+        "threads": threads,
+        "fit_seconds": fit_seconds,
+        "predict_seconds": predict_seconds,
+        "accuracy": float((predictions == y_test).mean()),
+        "recall": per_class,
+        "params": {key: value for key, value in model.get_params().items() if isinstance(value, (int, float, str, bool, type(None)))},
+    }
+
+
+def _versions():
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    for module in ["sklearn", "xgboost", "lightgbm", "catboost", "joblib"]:
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return versions
+
+
+# Load the data once, fit the models concurrently in a process pool and write
+# the pickles plus training_report.json to output_dir.
+# `threads` is the total budget, split evenly between the concurrent fits.
+def train(data="Dataset.csv", output_dir=".", models=ENSEMBLE_ORDER, workers=None, threads=None, seed=DEFAULT_SEED,
+          test_size=DEFAULT_TEST_SIZE, params=None):
+    from sklearn.model_selection import train_test_split
+
+    models = list(models)
+    params = params or {}
+    threads = threads or os.cpu_count() or 1
+    workers = max(1, min(workers or len(models), len(models), threads))
+    per_model = max(1, threads // workers)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    X, y = load_dataset(data)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+    load_seconds = time.perf_counter() - start
+
+    block, layout = share_arrays(dict(zip(SPLITS, [X_train, X_test, y_train, y_test])))
+    results = {}
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=attach_shared,
+                                 initargs=(block.name, layout, per_model)) as pool:
+            futures = {pool.submit(fit_model, name, per_model, seed, output_dir, params.get(name)): name for name in models}
+            for future in as_completed(futures):
+                report = future.result()
+                results[report["model"]] = report
+                print(f"{report['model']:>14}: accuracy {report['accuracy']:.2%}  fit {report['fit_seconds']:.2f} s  "
+                      f"({report['threads']} threads)")
+    finally:
+        block.close()
+        block.unlink()
+    total_seconds = time.perf_counter() - start
+
+    report = {
+        "data": os.path.basename(data),
+        "rows": len(X),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "seed": seed,
+        "test_size": test_size,
+        "feature_names": FEATURE_COLUMNS,
+        "labels": RISK_LABELS.tolist(),
+        "workers": workers,
+        "threads": threads,
+        "load_seconds": load_seconds,
+        "train_seconds": total_seconds,
+        "versions": _versions(),
+        "models": {name: results[name] for name in models},
+    }
+    with open(os.path.join(output_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the five fire risk models in parallel")
+    parser.add_argument("--data", default="Dataset.csv")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--models", nargs="+", default=ENSEMBLE_ORDER, choices=ENSEMBLE_ORDER)
+    parser.add_argument("--workers", type=int, default=None, help="concurrent fits (default: one per model)")
+    parser.add_argument("--threads", type=int, default=None, help="total thread budget (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--test-size", type=float, default=DEFAULT_TEST_SIZE)
+    parser.add_argument("--params", default=None, help="tuning_results.json from tune.py, to train with its best parameters")
+    args = parser.parse_args()
+
+    params = None
+    if args.params:
+        with open(args.params) as f:
+            params = {name: trial["params"] for name, trial in json.load(f)["best"].items()}
+    report = train(args.data, args.output_dir, args.models, args.workers, args.threads, args.seed, args.test_size, params)
+    print(f"trained {len(report['models'])} models in {report['train_seconds']:.1f} s "
+          f"(data loaded in {report['load_seconds']:.2f} s), report in {os.path.join(args.output_dir, REPORT_FILE)}")
@@ -0,0 +1,319 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from inference import ENSEMBLE_ORDER
+from model_registry import file_sha256
+from train import DEFAULT_SEED, attach_shared, load_dataset, share_arrays, shared_arrays
+
+DEFAULT_TRIALS = 9
+DEFAULT_ETA = 3
+DEFAULT_FINALISTS = 3
+LATENCY_REPEATS = 5
+DEFAULT_LATENCY_WEIGHT = 0.001
+DEFAULT_VALID_SIZE = 0.2
+DEFAULT_CACHE_DIR = ".tune_cache"
+EARLY_STOPPING_ROUNDS = 20
+RESULTS_FILE = "tuning_results.json"
+SPLITS = ["X_train", "X_valid", "y_train", "y_valid"]
+
+# Search space per model family, in the sklearn wrapper's parameter names
+# (the native APIs accept the same names as aliases). Budget is the number of
+# boosting rounds / trees given to the last successive-halving rung.
+SEARCH_SPACES = {
+    "xgboost": {
+        "budget": 600,
+        "params": {
+            "max_depth": [3, 4, 6, 8],
+            "learning_rate": [0.03, 0.1, 0.3],
+            "min_child_weight": [1, 3, 5],
+            "subsample": [0.7, 0.85, 1.0],
+            "colsample_bytree": [0.6, 0.8, 1.0],
+        },
+    },
+    "lightgbm": {
+        "budget": 600,
+        "params": {
+            "num_leaves": [7, 15, 31, 63],
+            "learning_rate": [0.03, 0.1, 0.3],
+            "min_child_samples": [5, 20, 50],
+            "colsample_bytree": [0.6, 0.8, 1.0],
+        },
+    },
+    "catboost": {
+        "budget": 900,
+        "params": {
+            "depth": [4, 6, 8],
+            "learning_rate": [0.03, 0.1, 0.3],
+            "l2_leaf_reg": [1, 3, 10],
+        },
+    },
+    "random_forest": {
+        "budget": 300,
+        "params": {
+            "max_depth": [8, 12, 18, None],
+            "min_samples_leaf": [1, 2, 5],
+            "max_features": ["sqrt", 0.5, 1.0],
+        },
+    },
+    "decision_tree": {
+        "budget": None,
+        "params": {
+            "max_depth": [3, 5, 8, 12, None],
+            "min_samples_leaf": [1, 2, 5, 10],
+            "criterion": ["gini", "entropy"],
+        },
+    },
+}
+
+
+# Train/validation split of Dataset.csv, cached as .npz keyed on the file's
+# contents, the seed and the validation size
+def cached_splits(data, seed=DEFAULT_SEED, valid_size=DEFAULT_VALID_SIZE, cache_dir=DEFAULT_CACHE_DIR):
+    from sklearn.model_selection import train_test_split
+
+    path = os.path.join(cache_dir, f"splits-{file_sha256(data)[:16]}-{seed}-{valid_size}.npz")
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return {split: cached[split] for split in SPLITS}
+    X, y = load_dataset(data)
+    splits = dict(zip(SPLITS, train_test_split(X, y, test_size=valid_size, random_state=seed, stratify=y)))
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(path, **splits)
+    return splits
+
+
+# Random configurations from a family's search space, without repeats
+def sample_params(family, n_trials, rng):
+    space = SEARCH_SPACES[family]["params"]
+    total = math.prod(len(choices) for choices in space.values())
+    seen, trials = set(), []
+    while len(trials) < min(n_trials, total):
+        params = {name: rng.choice(choices) for name, choices in space.items()}
+        key = json.dumps(params, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            trials.append(params)
+    return trials
+
+
+# Rung budgets for successive halving: budget / eta**k, ..., budget
+def rung_budgets(family, eta=DEFAULT_ETA, rungs=3):
+    budget = SEARCH_SPACES[family]["budget"]
+    if budget is None:
+        return [None]
+    return [max(1, budget // eta ** k) for k in reversed(range(rungs))]
+
+
+_native = {}
+
+
+# Native training/validation datasets, built once per worker process and reused by every trial
+def native_data(family):
+    if family not in _native:
+        X_train, X_valid, y_train, y_valid = (shared_arrays[split] for split in SPLITS)
+        if family == "xgboost":
+            import xgboost as xgb
+            _native[family] = xgb.DMatrix(X_train, label=y_train), xgb.DMatrix(X_valid, label=y_valid)
+        elif family == "lightgbm":
+            import lightgbm as lgb
+            dataset_params = {"feature_pre_filter": False, "verbosity": -1}
+            train_set = lgb.Dataset(X_train, label=y_train, params=dataset_params, free_raw_data=False).construct()
+            valid_set = lgb.Dataset(X_valid, label=y_valid, reference=train_set, params=dataset_params).construct()
+            _native[family] = train_set, valid_set
+        elif family == "catboost":
+            from catboost import Pool
+            _native[family] = Pool(X_train, y_train), Pool(X_valid, y_valid)
+        else:
+            _native[family] = (X_train, y_train), (X_valid, y_valid)
+    return _native[family]
+
+
+# Fit one configuration with early stopping on the validation split.
+# Returns (predict function on a numpy batch, rounds or trees actually used)
+def fit_trial(family, params, budget, threads, seed):
+    train_data, valid_data = native_data(family)
+    n_classes = int(shared_arrays["y_train"].max()) + 1
+    if family == "xgboost":
+        import xgboost as xgb
+        booster = xgb.train({**params, "objective": "multi:softprob", "num_class": n_classes, "eval_metric": "mlogloss",
+                             "nthread": threads, "seed": seed},
+                            train_data, budget, evals=[(valid_data, "valid")],
+                            early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False)
+        rounds = booster.best_iteration + 1
+        return lambda X: booster.inplace_predict(X, iteration_range=(0, rounds)).argmax(axis=1), rounds
+    if family == "lightgbm":
+        import lightgbm as lgb
+        booster = lgb.train({**params, "objective": "multiclass", "num_class": n_classes, "num_threads": threads,
+                             "seed": seed, "verbosity": -1},
+                            train_data, budget, valid_sets=[valid_data],
+                            callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)])
+        rounds = booster.best_iteration or budget
+        return lambda X: booster.predict(X, num_iteration=rounds).argmax(axis=1), rounds
+    if family == "catboost":
+        from catboost import CatBoostClassifier
+        model = CatBoostClassifier(**params, iterations=budget, random_seed=seed, thread_count=threads, verbose=0,
+                                   allow_writing_files=False)
+        model.fit(train_data, eval_set=valid_data, early_stopping_rounds=EARLY_STOPPING_ROUNDS, use_best_model=True)
+        return lambda X: np.asarray(model.predict(X)).reshape(len(X)), model.tree_count_
+    if family == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+        model = RandomForestClassifier(**params, n_estimators=budget, n_jobs=threads, random_state=seed)
+    else:
+        from sklearn.tree import DecisionTreeClassifier
+        model = DecisionTreeClassifier(**params, random_state=seed)
+    model.fit(*train_data)
+    return model.predict, budget
+
+
+# Fit one configuration and score it on the validation split. Latency is not
+# measured here: trials share the CPUs, so it is timed for finalists afterwards.
+def run_trial(family, params, budget, threads, seed):
+    start = time.perf_counter()
+    predict, rounds = fit_trial(family, params, budget, threads, seed)
+    fit_seconds = time.perf_counter() - start
+    predictions = np.asarray(predict(shared_arrays["X_valid"])).astype(np.int64)
+    return {
+        "family": family,
+        "params": params,
+        "budget": budget,
+        "rounds": int(rounds) if rounds is not None else None,
+        "accuracy": float((predictions == shared_arrays["y_valid"]).mean()),
+        "fit_seconds": fit_seconds,
+    }
+
+
+# Refit a finalist and time batch inference on the validation split with
+# nothing else running: microseconds per row, best of LATENCY_REPEATS runs
+def time_trial(trial, threads, seed):
+    predict, _ = fit_trial(trial["family"], trial["params"], trial["budget"], threads, seed)
+    X_valid = shared_arrays["X_valid"]
+    predict(X_valid)
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        predict(X_valid)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(X_valid) * 1e6
+
+
+# Final sklearn-wrapper parameters for train.build_model, with the number of
+# rounds early stopping settled on
+def best_params(trial):
+    params = dict(trial["params"])
+    if trial["family"] == "catboost":
+        params["iterations"] = trial["rounds"]
+    elif trial["rounds"] is not None:
+        params["n_estimators"] = trial["rounds"]
+    return params
+
+
+# Successive halving over every family at once: each rung runs all surviving
+# trials in parallel at that rung's budget, then keeps the most accurate 1/eta
+# per family (at least `finalists` for the last rung). The finalists are then
+# refitted and timed one at a time, and ranked by accuracy - latency_weight * us/row.
+def search(data="Dataset.csv", families=ENSEMBLE_ORDER, n_trials=DEFAULT_TRIALS, eta=DEFAULT_ETA,
+           latency_weight=DEFAULT_LATENCY_WEIGHT, workers=None, threads=None, seed=DEFAULT_SEED,
+           valid_size=DEFAULT_VALID_SIZE, cache_dir=DEFAULT_CACHE_DIR, finalists=DEFAULT_FINALISTS):
+    rng = random.Random(seed)
+    threads = threads or os.cpu_count() or 1
+    workers = max(1, min(workers or threads, threads))
+    per_trial = max(1, threads // workers)
+
+    start = time.perf_counter()
+    splits = cached_splits(data, seed, valid_size, cache_dir)
+    split_seconds = time.perf_counter() - start
+
+    alive = {family: sample_params(family, n_trials, rng) for family in families}
+    budgets = {family: rung_budgets(family, eta) for family in families}
+    trials = []
+    block, layout = share_arrays(splits)
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"), initializer=attach_shared,
+                                 initargs=(block.name, layout, per_trial)) as pool:
+            for rung in range(max(len(b) for b in budgets.values())):
+                jobs = [(family, params, budgets[family][rung]) for family in families if rung < len(budgets[family])
+                        for params in alive[family]]
+                if not jobs:
+                    break
+                futures = [pool.submit(run_trial, family, params, budget, per_trial, seed)
+                           for family, params, budget in jobs]
+                results = [future.result() for future in futures]
+                for result in results:
+                    result["rung"] = rung
+                trials.extend(results)
+                for family in families:
+                    if rung + 1 < len(budgets[family]):
+                        ranked = sorted((r for r in results if r["family"] == family), key=lambda r: -r["accuracy"])
+                        keep = len(ranked) // eta
+                        if rung + 2 == len(budgets[family]):
+                            keep = max(keep, finalists)
+                        alive[family] = [r["params"] for r in ranked[:max(1, keep)]]
+                print(f"rung {rung}: {len(jobs)} trials, best accuracy "
+                      + ", ".join(f"{family} {max(r['accuracy'] for r in results if r['family'] == family):.4f}"
+                                  for family in families if any(r["family"] == family for r in results)))
+    finally:
+        block.close()
+        block.unlink()
+    search_seconds = time.perf_counter() - start
+
+    # Serial latency measurement in this process, on the same split
+    start = time.perf_counter()
+    shared_arrays.update(splits)
+    best = {}
+    for family in families:
+        final = [t for t in trials if t["family"] == family and t["rung"] == len(budgets[family]) - 1]
+        for trial in final:
+            trial["latency_us"] = time_trial(trial, per_trial, seed)
+            trial["objective"] = trial["accuracy"] - latency_weight * trial["latency_us"]
+        winner = max(final, key=lambda t: t["objective"])
+        best[family] = {**winner, "params": best_params(winner)}
+    return {
+        "data": os.path.basename(data),
+        "seed": seed,
+        "valid_size": valid_size,
+        "eta": eta,
+        "latency_weight": latency_weight,
+        "workers": workers,
+        "threads": threads,
+        "split_seconds": split_seconds,
+        "search_seconds": search_seconds,
+        "timing_seconds": time.perf_counter() - start,
+        "best": best,
+        "trials": trials,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search with successive halving")
+    parser.add_argument("--data", default="Dataset.csv")
+    parser.add_argument("--models", nargs="+", default=ENSEMBLE_ORDER, choices=ENSEMBLE_ORDER)
+    parser.add_argument("--trials", type=int, default=DEFAULT_TRIALS, help="configurations sampled per model family")
+    parser.add_argument("--eta", type=int, default=DEFAULT_ETA, help="keep 1/eta of the trials at every rung")
+    parser.add_argument("--latency-weight", type=float, default=DEFAULT_LATENCY_WEIGHT,
+                        help="accuracy given up per microsecond of inference per row")
+    parser.add_argument("--finalists", type=int, default=DEFAULT_FINALISTS,
+                        help="configurations per family that reach the last rung and are timed serially")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=None, help="total thread budget (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    results = search(args.data, args.models, args.trials, args.eta, args.latency_weight, args.workers, args.threads, args.seed,
+                     finalists=args.finalists)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for family, trial in results["best"].items():
+        print(f"{family:>14}: accuracy {trial['accuracy']:.2%}  {trial['latency_us']:.2f} us/row  {trial['params']}")
+    print(f"{len(results['trials'])} trials in {results['search_seconds']:.1f} s, finalists timed in "
+          f"{results['timing_seconds']:.1f} s, results in {args.output} "
+          f"(train with: python train.py --params {args.output})")